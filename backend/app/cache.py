@@ -0,0 +1,268 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from app import serialization
+from app.db import connect
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# How long a result from each source stays fresh, in seconds
+SOURCE_TTLS = {
+    "logo": 21 * DAY,
+    "finance": DAY,
+    "news": 15 * MINUTE,
+    "legal": 12 * HOUR,
+    "legal_articles": 12 * HOUR,
+    "ambitionbox": DAY,
+    "reviews": DAY,
+}
+DEFAULT_TTL = HOUR
+# Expired results can still be served, while a refresh runs, for this long past their TTL
+MAX_STALE = float(os.getenv("CACHE_MAX_STALE_DAYS", 7)) * DAY
+
+
+def normalize_company_name(company_name):
+    """Cache key for a company: lowercase with collapsed whitespace"""
+    return " ".join(company_name.lower().split())
+
+
+class ResultCache:
+    """
+    Two-tier cache for per-company source results.
+
+    A bounded in-memory LRU sits in front of a SQLite table, so results survive
+    restarts and hot companies are answered without touching disk.
+    Values must be JSON-serializable; None is never cached.
+    Expired values are kept for MAX_STALE so callers can serve them while revalidating.
+
+    Every worker process opens the same database, so results and leases
+    (which worker is fetching what) are shared between them.
+
+    Reads use their own connection and `_lock` guards only the in-memory
+    tier, so a lookup never waits behind a write that is waiting for
+    another worker's commit.
+    """
+
+    def __init__(self, db_path, max_entries=1024, ttls=None, max_stale=MAX_STALE):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttls = dict(SOURCE_TTLS if ttls is None else ttls)
+        self.max_stale = max_stale
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = connect(db_path)
+        self._write_lock = threading.Lock()
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS results (
+                source TEXT NOT NULL,
+                company TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (source, company)
+            );
+            CREATE TABLE IF NOT EXISTS requests (
+                company TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                last_requested REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS leases (
+                source TEXT NOT NULL,
+                company TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (source, company)
+            );"""
+        )
+        self._conn.commit()
+        # WAL readers see the last commit without blocking on the writer
+        self._read_conn = connect(db_path)
+        self._read_lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_for(self, source):
+        return self.ttls.get(source, DEFAULT_TTL)
+
+    def _entry(self, key, now, max_stale=None):
+        """(value, expires_at, from_memory) for a key still within max_stale, else None"""
+        with self._lock:
+            entry = self._memory.get(key)
+        from_memory = entry is not None
+        # An expired value may have been refreshed by another worker since we kept it
+        if entry is None or entry[1] <= now:
+            with self._read_lock:
+                row = self._read_conn.execute(
+                    "SELECT value, expires_at FROM results WHERE source = ? AND company = ?", key
+                ).fetchone()
+            if row is not None and (entry is None or row[1] > entry[1]):
+                entry = (serialization.loads(row[0]), row[1])
+                from_memory = False
+        if entry is None or entry[1] + (self.max_stale if max_stale is None else max_stale) <= now:
+            return None
+        with self._lock:
+            if from_memory:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+            else:
+                # A set() may have stored a newer value while we were reading
+                current = self._memory.get(key)
+                if current is None or current[1] < entry[1]:
+                    self._remember(key, *entry)
+        return (*entry, from_memory)
+
+    def lookup(self, source, company_name, max_stale=None):
+        """
+        Return (value, fresh) for (source, company).
+
+        value is None on a miss; fresh is False when the value is past its TTL
+        but still within max_stale (MAX_STALE by default).
+        """
+        key = (source, normalize_company_name(company_name))
+        now = time.time()
+        entry = self._entry(key, now, max_stale)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None, False
+            value, expires_at, from_memory = entry
+            if expires_at <= now:
+                self.stale_hits += 1
+                return value, False
+            if from_memory:
+                self.memory_hits += 1
+            else:
+                self.disk_hits += 1
+            return value, True
+
+    def lookup_many(self, source, company_names):
+        """lookup() for several companies, in order"""
+        return [self.lookup(source, company_name) for company_name in company_names]
+
+    def get(self, source, company_name):
+        """Return the fresh cached value for (source, company), or None on a miss"""
+        value, fresh = self.lookup(source, company_name)
+        return value if fresh else None
+
+    def age(self, source, company_name):
+        """Seconds since the value for (source, company) was stored, or None if there is none"""
+        key = (source, normalize_company_name(company_name))
+        now = time.time()
+        entry = self._entry(key, now)
+        if entry is None:
+            return None
+        return self.ttl_for(source) - (entry[1] - now)
+
+    def set(self, source, company_name, value, ttl=None):
+        """Store a value in both tiers; ttl defaults to the source's TTL"""
+        if value is None:
+            return
+        key = (source, normalize_company_name(company_name))
+        expires_at = time.time() + (self.ttl_for(source) if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+        with self._write_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (source, company, value, expires_at) VALUES (?, ?, ?, ?)",
+                (*key, serialization.dumps(value).decode("utf-8"), expires_at),
+            )
+            self._conn.commit()
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def acquire_lease(self, source, company_name, owner, seconds):
+        """
+        Claim the right to fetch (source, company) for `seconds`.
+
+        Returns False while another owner holds an unexpired lease. A lease
+        whose holder died simply expires.
+        """
+        now = time.time()
+        with self._write_lock:
+            cursor = self._conn.execute(
+                """INSERT INTO leases (source, company, owner, expires_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(source, company) DO UPDATE SET
+                    owner = excluded.owner,
+                    expires_at = excluded.expires_at
+                WHERE leases.expires_at <= ? OR leases.owner = excluded.owner""",
+                (source, normalize_company_name(company_name), owner, now + seconds, now),
+            )
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def release_lease(self, source, company_name, owner):
+        with self._write_lock:
+            self._conn.execute(
+                "DELETE FROM leases WHERE source = ? AND company = ? AND owner = ?",
+                (source, normalize_company_name(company_name), owner),
+            )
+            self._conn.commit()
+
+    def lease_held(self, source, company_name):
+        """Whether some worker holds an unexpired lease on (source, company)"""
+        with self._read_lock:
+            row = self._read_conn.execute(
+                "SELECT 1 FROM leases WHERE source = ? AND company = ? AND expires_at > ?",
+                (source, normalize_company_name(company_name), time.time()),
+            ).fetchone()
+        return row is not None
+
+    def record_request(self, company_name):
+        """Count a lookup, so the most requested companies can be kept warm"""
+        with self._write_lock:
+            self._conn.execute(
+                """INSERT INTO requests (company, name, count, last_requested) VALUES (?, ?, 1, ?)
+                ON CONFLICT(company) DO UPDATE SET
+                    name = excluded.name,
+                    count = requests.count + 1,
+                    last_requested = excluded.last_requested""",
+                (normalize_company_name(company_name), company_name, time.time()),
+            )
+            self._conn.commit()
+
+    def top_companies(self, limit):
+        """Names of the most requested companies, as they were last typed"""
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                "SELECT name FROM requests ORDER BY count DESC, last_requested DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+            }
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """The process-wide cache, created on first use under the output/ directory"""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                db_path = os.getenv("CACHE_DB_PATH", os.path.join("output", "cache.db"))
+                os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+                _result_cache = ResultCache(db_path, max_entries=int(os.getenv("CACHE_MAX_ENTRIES", 1024)))
+    return _result_cache
@@ -0,0 +1,20 @@
+import os
+import sqlite3
+
+# How long a writer waits for another worker process to release the database
+BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT_SECONDS", 10))
+
+
+def connect(db_path):
+    """
+    Open a SQLite database that several worker processes share.
+
+    WAL lets readers carry on while one process writes, and the busy timeout
+    makes a writer wait for the lock instead of failing with
+    "database is locked".
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=BUSY_TIMEOUT)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Safe with WAL: a crash can lose the last commits but never corrupts the database
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
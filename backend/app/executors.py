@@ -0,0 +1,110 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class WorkloadExecutor:
+    """
+    A named, bounded worker pool for one class of blocking work.
+
+    Keeps its own counters so queue depth can be watched per workload:
+    in_flight is work submitted and not yet finished, queued is the part
+    of that still waiting for a free worker.
+    """
+
+    def __init__(self, name, max_workers, processes=False):
+        self.name = name
+        self.max_workers = max_workers
+        self.processes = processes
+        self._pool = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.peak_queued = 0
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.processes:
+                        self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        return self._pool
+
+    def in_flight(self):
+        return self.submitted - self.completed
+
+    def queued(self):
+        return max(0, self.in_flight() - self.max_workers)
+
+    def _done(self, future):
+        with self._lock:
+            self.completed += 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+
+    def submit(self, func, *args):
+        """Schedule func(*args) and return a concurrent.futures.Future"""
+        future = self.pool.submit(func, *args)
+        with self._lock:
+            self.submitted += 1
+            self.peak_queued = max(self.peak_queued, self.queued())
+        future.add_done_callback(self._done)
+        return future
+
+    async def run(self, func, *args):
+        """Await func(*args) on this pool; cancelling the caller drops the work if it has not started"""
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "kind": "process" if self.processes else "thread",
+                "max_workers": self.max_workers,
+                "in_flight": self.in_flight(),
+                "queued": self.queued(),
+                "peak_queued": self.peak_queued,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+
+# Selenium jobs get one worker per pooled browser, so waiting for a browser never ties up other workers
+BROWSER_WORKERS = int(os.getenv("EXECUTOR_BROWSER_WORKERS", os.getenv("BROWSER_POOL_SIZE", 2)))
+# HTTP scrapes and yfinance downloads mostly wait on sockets
+NETWORK_WORKERS = int(os.getenv("EXECUTOR_NETWORK_WORKERS", 32))
+# Parsing and scoring; set CPU_EXECUTOR_PROCESSES=1 to score in worker processes instead of threads
+CPU_WORKERS = int(os.getenv("EXECUTOR_CPU_WORKERS", os.cpu_count() or 2))
+CPU_PROCESSES = os.getenv("CPU_EXECUTOR_PROCESSES", "").lower() in ("1", "true", "yes")
+
+executors = {
+    "browser": WorkloadExecutor("browser", BROWSER_WORKERS),
+    "network": WorkloadExecutor("network", NETWORK_WORKERS),
+    "cpu": WorkloadExecutor("cpu", CPU_WORKERS, processes=CPU_PROCESSES),
+}
+
+
+async def run(executor_name, func, *args):
+    return await executors[executor_name].run(func, *args)
+
+
+def submit(executor_name, func, *args):
+    return executors[executor_name].submit(func, *args)
+
+
+def stats():
+    return {name: executor.stats() for name, executor in executors.items()}
+
+
+def shutdown():
+    for executor in executors.values():
+        executor.shutdown()
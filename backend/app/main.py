@@ -1,24 +1,105 @@
+import time
+IMPORT_STARTED = time.perf_counter()
 import asyncio
-import json
+import functools
+import inspect
 import os
-from fastapi import FastAPI
+import sys
+import threading
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-import time
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
-# Import the new functions from your updated scripts
-from app.scripts.new_finance import analyze_company
-from app.scripts.gnews_fetcher import fetch_news_rating
-from app.scripts.mouthshut_scraper import mouthshut_fetch
-from app.scripts.kanoon_scraper import fetch_indiankanoon_final
-from app.scripts.ambitionbox_scraper import get_ambitionbox_rating
-from app.scripts.logo_fetcher import retrieve_logo
+# Source functions are imported on first use (or by the background warm-up), see app/sources.py
+from pydantic import BaseModel
+from app.sources import SourceRef
+from app import sources
+from app.scripts.logo_store import image_path
+from app.scripts import http_client
+from app.scripts import ticker_index
+from app.serialization import compress_stream, ndjson_line, negotiate_encoding
+from app.scripts import rate_limiter
+from app.cache import get_result_cache, normalize_company_name
+from app.singleflight import SingleFlight, WorkerLeases
+from app import executors
+from app.metrics import registry, CONTENT_TYPE, WorkerMetrics
+from app.refresher import RefreshScheduler, watchlist_from_env
+
+analyze_company = SourceRef("app.scripts.new_finance", "analyze_company")
+fetch_companies_statements = SourceRef("app.scripts.new_finance", "fetch_companies_statements")
+financial_analysis_scores = SourceRef("app.scripts.new_finance", "financial_analysis_scores")
+scores_by_company = SourceRef("app.scripts.new_finance", "scores_by_company")
+fetch_news_rating = SourceRef("app.scripts.gnews_fetcher", "fetch_news_rating")
+mouthshut_fetch = SourceRef("app.scripts.mouthshut_scraper", "mouthshut_fetch")
+fetch_indiankanoon_final = SourceRef("app.scripts.kanoon_scraper", "fetch_indiankanoon_final")
+crawl_indiankanoon = SourceRef("app.scripts.kanoon_scraper", "crawl_indiankanoon")
+get_ambitionbox_rating = SourceRef("app.scripts.ambitionbox_scraper", "get_ambitionbox_rating")
+retrieve_logo = SourceRef("app.scripts.logo_fetcher", "retrieve_logo")
+prewarm_logos = SourceRef("app.scripts.logo_fetcher", "prewarm_logos")
+browser_pool = SourceRef("app.scripts.browser_pool", "browser_pool")
+lexicon_index = SourceRef("app.scripts.sentiment", "lexicon_index")
+vader_analyzer = SourceRef("app.scripts.sentiment", "vader_analyzer")
+
+# Import every source in the background after startup; turn off to import each on its first request only
+WARM_SOURCES = os.getenv("WARM_SOURCES", "1").lower() in ("1", "true", "yes")
+
+startup_report = {}
+
+async def warm_up(label, func, executor="network"):
+    try:
+        await executors.run(executor, func)
+    except Exception as e:
+        print(f"Could not warm {label}: {str(e)}")
+
+async def reload_ticker_index_periodically():
+    """Each worker process keeps, and reloads, its own in-memory copy of the index"""
+    while True:
+        await warm_up("ticker index", ticker_index.reload_index)
+        await asyncio.sleep(ticker_index.RELOAD_INTERVAL)
 
-app = FastAPI(title="CoPI by Mihir")
+async def warm_sources():
+    """Import the source modules, then start browsers and load the sentiment lexicons"""
+    started = time.perf_counter()
+    await warm_up("source modules", sources.warm_imports)
+    startup_report["sources_warm_seconds"] = round(time.perf_counter() - started, 4)
+    print(f"Source modules imported in {startup_report['sources_warm_seconds']:.2f}s")
+    for module_name, report in sorted(sources.import_report.items(), key=lambda item: -item[1]["seconds"]):
+        print(f"  {module_name}: {report['seconds']:.2f}s {' '.join(report['new_packages'])}")
+    await asyncio.gather(
+        warm_up("browser pool", lambda: browser_pool.load().warm(), "browser"),
+        # On the network threads: the lexicons must be loaded in this process, and the cpu executor may be a process pool
+        warm_up("LM lexicon", lambda: lexicon_index.load()()),
+        warm_up("VADER", lambda: vader_analyzer.load()()),
+    )
+
+@asynccontextmanager
+async def lifespan(app):
+    startup_report["ready_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 4)
+    print(f"Accepting requests {startup_report['ready_seconds']:.2f}s after import")
+    # Load the sources, start browsers and load the ticker index without delaying startup
+    warmups = [asyncio.create_task(reload_ticker_index_periodically())]
+    if WARM_SOURCES:
+        warmups.append(asyncio.create_task(warm_sources()))
+    if ENABLE_BACKGROUND_REFRESH:
+        warmups.append(asyncio.create_task(refresh_scheduler.run()))
+    if worker_metrics is not None:
+        warmups.append(asyncio.create_task(publish_metrics_periodically()))
+    yield
+    for warmup in warmups:
+        warmup.cancel()
+    refresh_scheduler.stop()
+    # Release pooled upstream connections and browsers
+    await http_client.aclose()
+    if "app.scripts.browser_pool" in sys.modules:
+        await asyncio.to_thread(browser_pool.load().close)
+    executors.shutdown()
+
+app = FastAPI(title="CoPI by Mihir", lifespan=lifespan)
 
 origins = os.getenv("ALLOWED_ORIGINS", "").split(",")
 app.add_middleware(
@@ -31,111 +112,571 @@ app.add_middleware(
 
 os.makedirs("output", exist_ok=True)
 
+result_cache = get_result_cache()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to CoPI. Are you sure you're supposed to be here? Go Fish!"}
 
-async def generate_company_info(company_name):
-    """Generate company information from all sources"""
-    print(f"Generating info for company: {company_name}")
+# Concurrency limits: tasks running at once for a single request, and across the process
+MAX_TASKS_PER_REQUEST = int(os.getenv("MAX_TASKS_PER_REQUEST", 6))
+MAX_CONCURRENT_TASKS = int(os.getenv("MAX_CONCURRENT_TASKS", 24))
+global_semaphore = asyncio.Semaphore(MAX_CONCURRENT_TASKS)
+# Bulk requests get a larger slice of the process budget, and a cap on list size
+MAX_TASKS_PER_BULK_REQUEST = int(os.getenv("MAX_TASKS_PER_BULK_REQUEST", 16))
+MAX_BULK_COMPANIES = int(os.getenv("MAX_BULK_COMPANIES", 1000))
+
+# Stream Indian Kanoon judgment headlines as an extra "legal_articles" task
+ENABLE_LEGAL_ARTICLES = os.getenv("ENABLE_LEGAL_ARTICLES", "").lower() in ("1", "true", "yes")
+LEGAL_ARTICLE_PAGES = int(os.getenv("LEGAL_ARTICLE_PAGES", 1))
+
+# Time budget for each source in seconds, e.g. TASK_TIMEOUT_REVIEWS=30, and for a whole /api/company request
+DEFAULT_TASK_TIMEOUTS = {
+    "logo": 10,
+    "finance": 30,
+    "news": 15,
+    "legal": 20,
+    "ambitionbox": 15,
+    "reviews": 45,
+    "legal_articles": 60,
+}
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE_SECONDS", 60))
+
+def task_timeout(task_name):
+    return float(os.getenv(f"TASK_TIMEOUT_{task_name.upper()}", DEFAULT_TASK_TIMEOUTS.get(task_name, 30)))
+
+# Source lookups currently running, keyed on (task name, normalized company name)
+inflight = SingleFlight()
+
+# With several worker processes (RUN_MODE=production in run.py) a lookup is also shared between them
+SHARED_LEASES = os.getenv("SHARED_LEASES", "1" if int(os.getenv("WEB_CONCURRENCY", 1)) > 1 else "0").lower() in ("1", "true", "yes")
+worker_leases = WorkerLeases(result_cache) if SHARED_LEASES else None
+
+def fetch_once(task_name, cache_key, fetch):
+    """Run fetch() under the cross-worker lease for (task, company) when leases are on"""
+    if worker_leases is None:
+        return fetch()
+    # Twice the timeout so a slow holder keeps its lease, while a crashed one's expires soon after
+    return worker_leases.do(task_name, cache_key, 2 * task_timeout(task_name), fetch)
+
+def has_result(data):
+    """Whether a source's answer is worth caching: sources that found nothing report a rating of None (or NaN)"""
+    if data is None:
+        return False
+    if isinstance(data, dict):
+        # NaN is the only value not equal to itself
+        return all(data[key] is not None and data[key] == data[key] for key in ("rating", "Rating") if key in data)
+    return True
+
+def keep_late_result(task_name, late, future):
+    """Done-callback for work whose caller gave up: pass a result that still arrived to late()"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    print(f"Task {task_name} finished after its caller gave up")
+    # Done-callbacks can run on the event loop, so late() gets a worker thread
+    executors.submit("network", late, future.result())
+
+async def call_source(task_name, func, args, emit=None, executor="network", late=None):
+    """
+    Call a synchronous, asynchronous or streaming (async generator) source function.
+
+    A running thread cannot be interrupted, so when the caller is cancelled a
+    synchronous source that takes a `cancelled` event is told to stop, and a
+    result it still returns is handed to late().
+    """
+    if inspect.isasyncgenfunction(func):
+        data = []
+        async for record in func(*args):
+            data.append(record)
+            if emit is not None:
+                emit({"task": task_name, "status": "partial", "data": record})
+        return data
+    if asyncio.iscoroutinefunction(func):
+        return await func(*args)
+    cancelled = threading.Event()
+    if "cancelled" in inspect.signature(func).parameters:
+        func = functools.partial(func, cancelled=cancelled)
+    future = executors.submit(executor, func, *args)
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        cancelled.set()
+        if late is not None:
+            future.add_done_callback(functools.partial(keep_late_result, task_name, late))
+        raise
+
+async def execute_task(task_name, func, args, cache_key, request_semaphore, emit=None, executor="network", timeout=None):
+    """
+    Call a source function under the request and process limits and cache its result.
+
+    Blocking functions run on the named executor (see app/executors.py). The
+    timeout starts once the task has a slot, so time spent queued behind
+    other tasks does not count against the source. A result that arrives
+    after the timeout is still cached for the next request.
+    """
+    def store(data):
+        if cache_key is not None and has_result(data):
+            result_cache.set(task_name, cache_key, data)
+    
+    func = await sources.resolve(func)
+    async with request_semaphore, global_semaphore:
+        print(f"Processing task: {task_name}")
+        data = await asyncio.wait_for(call_source(task_name, func, args, emit, executor, store), timeout)
+    
+    # A write can wait on another worker's lock, so keep it off the event loop
+    await executors.run("network", store, data)
     
-    # Define tasks in the specified order
+    return data
+
+task_duration = registry.histogram(
+    "copi_task_duration_seconds", "Time to produce a source's result line", ("task", "cached")
+)
+task_results = registry.counter(
+    "copi_task_results_total", "Source result lines by status (success, error, timeout)", ("task", "status", "cached")
+)
+tasks_in_flight = registry.gauge("copi_tasks_in_flight", "Source tasks currently running for requests", ("task",))
+requests_in_flight = registry.gauge("copi_requests_in_flight", "Streaming responses currently open", ("endpoint",))
+
+def record_task_metrics(result):
+    cached = "no"
+    if result.get("cached"):
+        cached = "stale" if result.get("stale") else "fresh"
+    task_results.inc(task=result["task"], status=result["status"], cached=cached)
+    if "time_taken" in result:
+        task_duration.observe(result["time_taken"], task=result["task"], cached=cached)
+
+async def run_task(task, request_semaphore, emit=None, deadline=None):
+    """
+    Run a single source task and build its result line.
+
+    Streaming tasks pass each record to `emit` as a partial line when one is given.
+    The task is cancelled after its timeout, or at `deadline` (a time.monotonic()
+    value) if that comes first.
+    """
+    task_name = task.get("name", "unknown")
+    tasks_in_flight.inc(task=task_name)
+    try:
+        result = await run_task_uninstrumented(task, request_semaphore, emit, deadline)
+    finally:
+        tasks_in_flight.dec(task=task_name)
+    record_task_metrics(result)
+    return result
+
+async def run_task_uninstrumented(task, request_semaphore, emit=None, deadline=None):
+    task_name = task.get("name", "unknown")
+    try:
+        func = task["func"]
+        args = task.get("args", [])
+        cache_key = task.get("cache_key")
+        executor = task.get("executor", "network")
+        
+        timeout = task_timeout(task_name)
+        # Waiting for a slot is bounded only by the request's deadline, if it has one
+        remaining = None if deadline is None else max(0, deadline - time.monotonic())
+        
+        start_time = time.time()
+        try:
+            streaming = emit is not None and inspect.isasyncgenfunction(await sources.resolve(func))
+            if cache_key is None:
+                data = await asyncio.wait_for(
+                    execute_task(task_name, func, args, cache_key, request_semaphore, emit, executor, timeout),
+                    remaining
+                )
+            else:
+                # Serve from the cache when we can, without waiting for a slot
+                data, fresh = await executors.run("network", result_cache.lookup, task_name, cache_key)
+                if data is not None:
+                    if not fresh:
+                        # Stale while revalidate: answer with the last good result and refresh off the request path
+                        refresh_scheduler.schedule(task)
+                    return {
+                        "task": task_name,
+                        "status": "success",
+                        "data": data,
+                        "cached": True,
+                        "stale": not fresh,
+                        "time_taken": time.time() - start_time
+                    }
+                
+                if streaming:
+                    # Partial records belong to this request's stream, so these are not shared
+                    work = execute_task(task_name, func, args, cache_key, request_semaphore, emit, executor, timeout)
+                else:
+                    # Identical lookups already running in other requests share one upstream call
+                    work = inflight.do(
+                        (task_name, normalize_company_name(cache_key)),
+                        lambda: fetch_once(
+                            task_name, cache_key,
+                            lambda: execute_task(task_name, func, args, cache_key, request_semaphore, executor=executor, timeout=timeout)
+                        )
+                    )
+                data = await asyncio.wait_for(work, remaining)
+            
+            return {
+                "task": task_name,
+                "status": "success",
+                "data": data,
+                "time_taken": time.time() - start_time
+            }
+        except asyncio.TimeoutError:
+            print(f"Task {task_name} timed out after {time.time() - start_time:.1f}s")
+            # Anything we ever stored beats no answer, however old it is
+            stale = None
+            if cache_key is not None:
+                stale, _ = await executors.run("network", result_cache.lookup, task_name, cache_key, float("inf"))
+            if stale is not None:
+                return {
+                    "task": task_name,
+                    "status": "success",
+                    "data": stale,
+                    "cached": True,
+                    "stale": True,
+                    "timed_out": True,
+                    "time_taken": time.time() - start_time
+                }
+            return {
+                "task": task_name,
+                "status": "timeout",
+                "error": f"No result within {time.time() - start_time:.1f}s",
+                "time_taken": time.time() - start_time
+            }
+        except Exception as e:
+            print(f"Error in task {task_name}: {str(e)}")
+            return {
+                "task": task_name,
+                "status": "error",
+                "error": str(e),
+                "time_taken": time.time() - start_time
+            }
+    
+    except Exception as e:
+        print(f"Error processing task {task_name}: {str(e)}")
+        return {
+            "task": task_name,
+            "status": "error",
+            "error": f"Task execution error: {str(e)}"
+        }
+
+def build_tasks(company_name):
+    """Source tasks for one company; results are streamed in completion order, tagged by name"""
     tasks = [
         {
             "name":"logo",
             "func": retrieve_logo,
-            "args": [company_name]
+            "args": [company_name],
+            "cache_key": company_name
         },
         {
             "name": "finance",
             "func": analyze_company,
-            "args": [company_name]
+            "args": [company_name],
+            "cache_key": company_name
         },
         {
             "name": "news",
             "func": fetch_news_rating,
-            "args": [company_name]
+            "args": [company_name],
+            "cache_key": company_name
         },
         {
             "name": "legal",
             "func": fetch_indiankanoon_final,
-            "args": [company_name]
+            "args": [company_name],
+            "cache_key": company_name
         },
         {
             "name": "ambitionbox",
             "func": get_ambitionbox_rating,
-            "args": [company_name]
+            "args": [company_name],
+            "cache_key": company_name
         },
         {
             "name": "reviews",
             "func": mouthshut_fetch,
-            "args": [company_name]
+            "args": [company_name],
+            "cache_key": company_name,
+            "executor": "browser"
         }
     ]
+    if ENABLE_LEGAL_ARTICLES:
+        tasks.append({
+            "name": "legal_articles",
+            "func": crawl_indiankanoon,
+            "args": [company_name, LEGAL_ARTICLE_PAGES],
+            "cache_key": company_name
+        })
+    return tasks
+
+async def refresh_task(task, semaphore):
+    """Re-run a source task in the background and store its result"""
+    await inflight.do(
+        (task["name"], normalize_company_name(task["cache_key"])),
+        lambda: fetch_once(task["name"], task["cache_key"], lambda: execute_task(
+            task["name"], task["func"], task.get("args", []), task["cache_key"], semaphore,
+            executor=task.get("executor", "network"), timeout=task_timeout(task["name"])
+        ))
+    )
+
+# Keep the watchlist and the most requested companies warm between requests.
+# Every worker process runs its own scheduler; leases (see fetch_once) keep their refreshes from fetching twice.
+ENABLE_BACKGROUND_REFRESH = os.getenv("ENABLE_BACKGROUND_REFRESH", "1").lower() in ("1", "true", "yes")
+refresh_scheduler = RefreshScheduler(
+    build_tasks,
+    refresh_task,
+    result_cache,
+    watchlist=watchlist_from_env(),
+    top_companies=int(os.getenv("REFRESH_TOP_COMPANIES", 20)),
+    concurrency=int(os.getenv("REFRESH_CONCURRENCY", 4)),
+    jitter=float(os.getenv("REFRESH_JITTER_SECONDS", 30)),
+    tick=float(os.getenv("REFRESH_TICK_SECONDS", 60)),
+)
+
+async def generate_company_info(company_name):
+    """Generate company information from all sources"""
+    print(f"Generating info for company: {company_name}")
+    
+    tasks = build_tasks(company_name)
     
     print(f"Tasks defined: {len(tasks)}")
     
     # Signal the start of the process
-    yield json.dumps({"event": "start", "tasks_count": len(tasks)}) + "\n"
+    yield ndjson_line({"event": "start", "tasks_count": len(tasks)})
     
-    # Process each task
-    for task in tasks:
-        try:
-            task_name = task["name"]
-            func = task["func"]
-            args = task.get("args", [])
-            
-            print(f"Processing task: {task_name}")
-            
-            # Execute the task
-            start_time = time.time()
-            try:
-                # Handle both synchronous and asynchronous functions
-                if asyncio.iscoroutinefunction(func):
-                    data = await func(*args)
-                else:
-                    data = await asyncio.to_thread(func, *args)
-                
-                # For functions that return JSON strings, parse them
-                if isinstance(data, str):
-                    try:
-                        data = json.loads(data)
-                    except json.JSONDecodeError:
-                        # If it's not valid JSON, keep as is
-                        pass
-                
-                result = {
-                    "task": task_name,
-                    "status": "success",
-                    "data": data,
-                    "time_taken": time.time() - start_time
-                }
-            except Exception as e:
-                print(f"Error in task {task_name}: {str(e)}")
-                result = {
-                    "task": task_name,
-                    "status": "error",
-                    "error": str(e),
-                    "time_taken": time.time() - start_time
-                }
-            
-            yield json.dumps(result) + "\n"
-            
-        except Exception as e:
-            print(f"Error processing task {task.get('name', 'unknown')}: {str(e)}")
-            yield json.dumps({
-                "task": task.get("name", "unknown"),
-                "status": "error",
-                "error": f"Task execution error: {str(e)}"
-            }) + "\n"
+    # Start every task at once and stream each line as soon as it is ready:
+    # partial records from streaming tasks, then one final line per task
+    request_semaphore = asyncio.Semaphore(MAX_TASKS_PER_REQUEST)
+    deadline = time.monotonic() + REQUEST_DEADLINE
+    lines = asyncio.Queue()
+    
+    async def run_and_report(task):
+        result = await run_task(task, request_semaphore, emit=lambda line: lines.put_nowait((False, line)), deadline=deadline)
+        lines.put_nowait((True, result))
+    
+    pending = [asyncio.create_task(run_and_report(task)) for task in tasks]
+    try:
+        remaining = len(pending)
+        while remaining:
+            finished, line = await lines.get()
+            if finished:
+                remaining -= 1
+            yield ndjson_line(line)
+    finally:
+        # Client went away before everything finished: stop the remaining work
+        for task in pending:
+            if not task.done():
+                task.cancel()
     
     # Signal the end of the process
-    yield json.dumps({"event": "end"}) + "\n"
+    yield ndjson_line({"event": "end"})
+
+async def track_stream(endpoint, lines):
+    """Count a streaming response as in flight until it finishes or the client goes away"""
+    requests_in_flight.inc(endpoint=endpoint)
+    try:
+        async for line in lines:
+            yield line
+    finally:
+        requests_in_flight.dec(endpoint=endpoint)
+        await lines.aclose()
+
+def stream_lines(endpoint, lines, accept_encoding):
+    """
+    NDJSON streaming response, compressed with br or gzip when the client accepts it.
+
+    The compressor is flushed after every line so results still arrive as they finish.
+    """
+    encoding = negotiate_encoding(accept_encoding)
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(
+        compress_stream(track_stream(endpoint, lines), encoding),
+        media_type="text/event-stream",
+        headers=headers,
+    )
+
+singleflight_keys = registry.gauge("copi_singleflight_in_flight", "Distinct source lookups shared between requests")
+executor_workers = registry.gauge("copi_executor_workers", "Worker limit of each executor", ("executor",))
+executor_in_flight = registry.gauge("copi_executor_in_flight", "Jobs submitted to each executor and not finished", ("executor",))
+executor_queued = registry.gauge("copi_executor_queue_depth", "Jobs waiting for a free worker", ("executor",))
+executor_completed = registry.counter("copi_executor_completed_total", "Jobs finished by each executor", ("executor",))
+upstream_circuit_open = registry.gauge("copi_upstream_circuit_open", "1 while a host's circuit breaker is open", ("host",))
+upstream_throttled = registry.counter("copi_upstream_throttled_total", "Requests delayed by the per-host rate limiter", ("host",))
+upstream_rejected = registry.counter("copi_upstream_rejected_total", "Requests refused by the rate limiter or circuit breaker", ("host",))
+cache_lookups = registry.counter("copi_cache_lookups_total", "Result cache lookups by outcome", ("result",))
+
+def collect_runtime_metrics():
+    singleflight_keys.set(inflight.in_flight())
+    for name, stats in executors.stats().items():
+        executor_workers.set(stats["max_workers"], executor=name)
+        executor_in_flight.set(stats["in_flight"], executor=name)
+        executor_queued.set(stats["queued"], executor=name)
+        executor_completed.set_total(stats["completed"], executor=name)
+    for host, stats in rate_limiter.stats().items():
+        upstream_circuit_open.set(1 if stats["circuit"] == "open" else 0, host=host)
+        upstream_throttled.set_total(stats["throttled"], host=host)
+        upstream_rejected.set_total(stats["rejected"], host=host)
+    cache = result_cache.stats()
+    for result in ("memory_hits", "disk_hits", "stale_hits", "misses"):
+        cache_lookups.set_total(cache[result], result=result)
+
+registry.add_collector(collect_runtime_metrics)
+
+# With several worker processes, each publishes its metrics here so any of them can answer a scrape for all
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join("output", "metrics") if int(os.getenv("WEB_CONCURRENCY", 1)) > 1 else "")
+worker_metrics = WorkerMetrics(registry, METRICS_DIR, float(os.getenv("METRICS_PUBLISH_SECONDS", 5))) if METRICS_DIR else None
+
+async def publish_metrics_periodically():
+    while True:
+        try:
+            await executors.run("network", worker_metrics.publish)
+        except Exception as e:
+            print(f"Could not publish worker metrics: {str(e)}")
+        await asyncio.sleep(worker_metrics.interval)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint; samples carry a worker label when several workers run"""
+    if worker_metrics is None:
+        return Response(registry.render(), media_type=CONTENT_TYPE)
+    return Response(await executors.run("network", worker_metrics.render), media_type=CONTENT_TYPE)
+
+@app.get("/api/startup")
+async def startup_stats():
+    """How long the app took to start, and what importing each source module cost"""
+    return {**startup_report, "sources": sources.import_report}
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss/eviction counters for the result cache and background refresh progress"""
+    return {
+        **result_cache.stats(),
+        "refresh": refresh_scheduler.stats(),
+        "lease_waits": worker_leases.waits if worker_leases is not None else 0,
+    }
+
+@app.get("/api/executors/stats")
+async def executor_stats():
+    """Size and queue depth of each worker pool"""
+    return executors.stats()
+
+@app.get("/api/upstreams/stats")
+async def upstream_stats():
+    """Rate limit, backoff and circuit breaker state for each upstream host"""
+    return rate_limiter.stats()
 
 @app.get("/api/company/{company_name}")
-async def get_company_info(company_name: str):
+async def get_company_info(company_name: str, http_request: Request):
     """Stream company information as it becomes available"""
-    return StreamingResponse(
-        generate_company_info(company_name),
-        media_type="text/event-stream"
+    await executors.run("network", result_cache.record_request, company_name)
+    return stream_lines("company", generate_company_info(company_name), http_request.headers.get("accept-encoding"))
+
+class CompaniesRequest(BaseModel):
+    companies: list[str]
+    # Optional subset of task names to run, e.g. ["finance", "news"]
+    tasks: list[str] | None = None
+
+async def run_finance_batch(company_names, request_semaphore):
+    """Score every company's finances in one batched call, reusing cached results"""
+    results = {}
+    missing = []
+    cached = await executors.run("network", result_cache.lookup_many, "finance", company_names)
+    for company_name, (data, fresh) in zip(company_names, cached):
+        if data is not None:
+            if not fresh:
+                refresh_scheduler.schedule(next(task for task in build_tasks(company_name) if task["name"] == "finance"))
+            results[company_name] = {"task": "finance", "status": "success", "data": data, "cached": True, "stale": not fresh, "time_taken": 0}
+        else:
+            missing.append(company_name)
+    
+    if missing:
+        start_time = time.time()
+        try:
+            async with request_semaphore, global_semaphore:
+                print(f"Processing finance batch: {len(missing)} companies")
+                tickers, statements = await (await sources.resolve(fetch_companies_statements))(missing)
+                # Scoring is pandas work, so it goes to the CPU pool (worker processes with CPU_EXECUTOR_PROCESSES=1)
+                scores = await executors.run("cpu", await sources.resolve(financial_analysis_scores), statements)
+                batch = (await sources.resolve(scores_by_company))(tickers, scores)
+            for company_name in missing:
+                data = batch.get(company_name)
+                if has_result(data):
+                    await executors.run("network", result_cache.set, "finance", company_name, data)
+                results[company_name] = {"task": "finance", "status": "success", "data": data, "time_taken": time.time() - start_time}
+        except Exception as e:
+            print(f"Error in finance batch: {str(e)}")
+            for company_name in missing:
+                results[company_name] = {"task": "finance", "status": "error", "error": str(e), "time_taken": time.time() - start_time}
+    
+    for result in results.values():
+        record_task_metrics(result)
+    return [{"company": company_name, **results[company_name]} for company_name in company_names]
+
+async def run_company_task(company_name, task, request_semaphore):
+    result = await run_task(task, request_semaphore)
+    return [{"company": company_name, **result}]
+
+async def generate_companies_info(company_names, task_names=None):
+    """Stream results for many companies as NDJSON lines tagged with company and task"""
+    print(f"Generating info for {len(company_names)} companies")
+    
+    selected = [task["name"] for task in build_tasks("") if task_names is None or task["name"] in task_names]
+    yield ndjson_line({"event": "start", "companies_count": len(company_names), "tasks_count": len(selected)})
+    
+    request_semaphore = asyncio.Semaphore(MAX_TASKS_PER_BULK_REQUEST)
+    pending = []
+    # Finance is fetched as a single batch; the other sources fan out per company
+    if "finance" in selected:
+        pending.append(asyncio.create_task(run_finance_batch(company_names, request_semaphore)))
+    for company_name in company_names:
+        for task in build_tasks(company_name):
+            if task["name"] in selected and task["name"] != "finance":
+                pending.append(asyncio.create_task(run_company_task(company_name, task, request_semaphore)))
+    try:
+        for next_done in asyncio.as_completed(pending):
+            for result in await next_done:
+                yield ndjson_line(result)
+    finally:
+        for task in pending:
+            if not task.done():
+                task.cancel()
+    
+    yield ndjson_line({"event": "end"})
+
+@app.post("/api/companies")
+async def get_companies_info(request: CompaniesRequest, http_request: Request):
+    """Stream information for a list of companies as it becomes available"""
+    # Drop blanks and duplicates, keeping the caller's order
+    company_names = list(dict.fromkeys(name.strip() for name in request.companies if name.strip()))
+    if not company_names:
+        raise HTTPException(status_code=400, detail="No companies given")
+    if len(company_names) > MAX_BULK_COMPANIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_COMPANIES} companies per request")
+    return stream_lines(
+        "companies", generate_companies_info(company_names, request.tasks), http_request.headers.get("accept-encoding")
     )
+
+class LogosRequest(BaseModel):
+    companies: list[str]
+
+@app.post("/api/logos/prewarm")
+async def prewarm_logo_store(request: LogosRequest):
+    """Resolve and store logos for a list of companies ahead of time"""
+    company_names = list(dict.fromkeys(name.strip() for name in request.companies if name.strip()))
+    if len(company_names) > MAX_BULK_COMPANIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_COMPANIES} companies per request")
+    logos = await (await sources.resolve(prewarm_logos))(company_names)
+    return {
+        "resolved": sum(1 for logo in logos.values() if logo),
+        "missing": [name for name, logo in logos.items() if not logo],
+    }
+
+@app.get("/api/logos/{file_name}")
+async def get_logo_image(file_name: str):
+    """Serve a logo from the local image cache; file names are content hashes, so they never change"""
+    path = image_path(file_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Logo not found")
+    return FileResponse(path, headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+startup_report["app_import_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 4)
@@ -0,0 +1,245 @@
+import json
+import os
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; sources range from cached lookups to multi-page browser scrapes
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels):
+    labels = list(labels)
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in labels) + "}"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named family of samples, one per combination of label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self, extra_labels=()):
+        """Sample lines, with extra_labels (e.g. the worker) added to every sample"""
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{format_labels(list(zip(self.label_names, key)) + list(extra_labels))} {format_value(value)}"
+            for key, value in items
+        ]
+
+    def render(self):
+        return self.header() + self.samples()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value, **labels):
+        """Mirror a running total kept elsewhere, e.g. by a collector"""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self, extra_labels=()):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            labels = list(zip(self.label_names, key)) + list(extra_labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(labels + [('le', format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Holds metric families and renders them in the Prometheus text format.
+
+    Collectors are callables run at scrape time that refresh gauges read from
+    elsewhere (executor queues, cache counters) just before rendering.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, label_names=()):
+        return self.register(Counter(name, help_text, label_names))
+
+    def gauge(self, name, help_text, label_names=()):
+        return self.register(Gauge(name, help_text, label_names))
+
+    def histogram(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, label_names, buckets))
+
+    def add_collector(self, collect):
+        with self._lock:
+            self._collectors.append(collect)
+
+    def snapshot(self, extra_labels=()):
+        """{family name: {"header": [...], "samples": [...]}}, after running the collectors"""
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics)
+        for collect in collectors:
+            try:
+                collect()
+            except Exception as e:
+                print(f"Metrics collector failed: {str(e)}")
+        return {
+            metric.name: {"header": metric.header(), "samples": metric.samples(extra_labels)}
+            for metric in metrics
+        }
+
+    def render(self, extra_labels=(), others=()):
+        """
+        The text exposition of this registry.
+
+        others are snapshots from other worker processes; their samples are
+        listed under the same family headers.
+        """
+        families = self.snapshot(extra_labels)
+        for other in others:
+            for name, family in other.items():
+                if name in families:
+                    families[name]["samples"].extend(family["samples"])
+                else:
+                    families[name] = {"header": family["header"], "samples": list(family["samples"])}
+        lines = []
+        for family in families.values():
+            lines.extend(family["header"])
+            lines.extend(family["samples"])
+        return "\n".join(lines) + "\n"
+
+
+class WorkerMetrics:
+    """
+    Metrics of every worker process, whichever one is scraped.
+
+    Each worker labels its samples with worker=<pid> and regularly writes a
+    snapshot to a shared directory; rendering merges the snapshots of all
+    workers that published recently. Without this a scrape would see one
+    random worker's totals, which read as counter resets.
+    """
+
+    def __init__(self, registry, directory, interval=5):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self.worker = str(os.getpid())
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, worker):
+        return os.path.join(self.directory, f"{worker}.json")
+
+    def publish(self):
+        snapshot = self.registry.snapshot((("worker", self.worker),))
+        tmp_path = self._path(self.worker) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self._path(self.worker))
+
+    def others(self):
+        """Snapshots of the other live workers; a file not refreshed for a few intervals belongs to a dead one"""
+        snapshots = []
+        now = time.time()
+        for file_name in os.listdir(self.directory):
+            worker, extension = os.path.splitext(file_name)
+            if extension != ".json" or worker == self.worker:
+                continue
+            path = os.path.join(self.directory, file_name)
+            try:
+                if now - os.path.getmtime(path) > 3 * self.interval:
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self):
+        return self.registry.render((("worker", self.worker),), self.others())
+
+
+registry = Registry()
+
+# Upstream traffic, fed by the rate limiter for both HTTP and browser page loads
+upstream_responses = registry.counter(
+    "copi_upstream_responses_total",
+    "Responses from upstream hosts by status code; status=\"error\" for connection failures",
+    ("host", "status"),
+)
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import random
+import time
+from app import executors
+from app.cache import SOURCE_TTLS, DEFAULT_TTL, normalize_company_name
+
+MINUTE = 60
+
+
+def watchlist_from_env():
+    """Companies to keep warm: REFRESH_WATCHLIST (comma separated) plus one per line from REFRESH_WATCHLIST_PATH"""
+    names = [name.strip() for name in os.getenv("REFRESH_WATCHLIST", "").split(",")]
+    path = os.getenv("REFRESH_WATCHLIST_PATH", "")
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            names.extend(line.strip() for line in f if not line.startswith("#"))
+    return [name for name in names if name]
+
+
+def refresh_interval(source):
+    """
+    How often the scheduler refreshes a source, in seconds.
+
+    Defaults to three quarters of the source's cache TTL so watched companies
+    never go stale; override with e.g. REFRESH_NEWS_MINUTES=10.
+    """
+    default = 0.75 * SOURCE_TTLS.get(source, DEFAULT_TTL) / MINUTE
+    return float(os.getenv(f"REFRESH_{source.upper()}_MINUTES", default)) * MINUTE
+
+
+class RefreshScheduler:
+    """
+    Keeps the result cache warm for a watchlist and the most requested companies.
+
+    Every `tick` seconds each (company, source) pair whose cached value is
+    older than its refresh interval is queued for a refresh. Refreshes start
+    after a random jitter and at most `concurrency` run at once, so they do
+    not arrive upstream in bursts or crowd out user requests.
+
+    `build_tasks(company)` returns the source tasks for a company and
+    `refresh(task, semaphore)` runs one and stores its result.
+    """
+
+    def __init__(self, build_tasks, refresh, cache, watchlist=(), top_companies=20,
+                 concurrency=4, jitter=30.0, tick=60.0):
+        self.build_tasks = build_tasks
+        self.refresh = refresh
+        self.cache = cache
+        self.watchlist = list(watchlist)
+        self.top_companies = top_companies
+        self.jitter = jitter
+        self.tick = tick
+        self.budget = asyncio.Semaphore(concurrency)
+        self.pending = {}
+        # Earliest time a failed or empty (source, company) refresh may be retried,
+        # so those are not retried every tick
+        self.next_attempt = {}
+        self.refreshed = 0
+        self.failed = 0
+
+    def companies(self):
+        names = self.watchlist + (self.cache.top_companies(self.top_companies) if self.top_companies else [])
+        unique = {}
+        for name in names:
+            unique.setdefault(normalize_company_name(name), name)
+        return list(unique.values())
+
+    def is_due(self, source, company_name):
+        age = self.cache.age(source, company_name)
+        return age is None or age >= refresh_interval(source)
+
+    def schedule(self, task, delay=0.0):
+        """Queue a refresh for one source task unless one is pending or recently attempted"""
+        key = (task["name"], normalize_company_name(task["cache_key"]))
+        if key in self.pending or self.next_attempt.get(key, 0) > time.time():
+            return False
+        self.pending[key] = asyncio.create_task(self._refresh(key, task, delay))
+        return True
+
+    def due_tasks(self):
+        """Source tasks whose cached value is older than their refresh interval; reads the cache, so runs off the loop"""
+        return [
+            task
+            for company_name in self.companies()
+            for task in self.build_tasks(company_name)
+            if self.is_due(task["name"], company_name)
+        ]
+
+    async def schedule_due(self):
+        for task in await executors.run("network", self.due_tasks):
+            self.schedule(task, delay=random.uniform(0, self.jitter))
+
+    async def _refresh(self, key, task, delay):
+        retry = True
+        try:
+            await asyncio.sleep(delay)
+            await self.refresh(task, self.budget)
+            # Nothing is cached when a source has no result, so back off as if it failed
+            age = await executors.run("network", self.cache.age, key[0], task["cache_key"])
+            retry = age is None or age >= self.cache.ttl_for(key[0])
+            if retry:
+                self.failed += 1
+            else:
+                self.refreshed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            print(f"Background refresh of {key[0]} for {key[1]} failed: {str(e)}")
+        finally:
+            if retry:
+                self.next_attempt[key] = time.time() + min(refresh_interval(key[0]), 15 * MINUTE)
+            else:
+                self.next_attempt.pop(key, None)
+            self.pending.pop(key, None)
+
+    async def run(self):
+        while True:
+            try:
+                await self.schedule_due()
+            except Exception as e:
+                print(f"Could not schedule refreshes: {str(e)}")
+            await asyncio.sleep(self.tick)
+
+    def stop(self):
+        for task in self.pending.values():
+            task.cancel()
+
+    def stats(self):
+        return {
+            "watchlist": len(self.watchlist),
+            "pending": len(self.pending),
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+        }
@@ -1,15 +1,15 @@
-import requests
-from bs4 import BeautifulSoup
+from app.scripts.html_parsing import make_soup, has_class
 import re
-import json
+from app.scripts import http_client
+from app import executors
 
-def scrape_rating(url):
-    headers = {
-        "User-Agent": "Mozilla/5.0"
-    }
+async def scrape_rating(url):
+    response = await http_client.aget(url)
+    return await executors.run("cpu", parse_rating, response.text)
 
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.text, "html.parser")
+def parse_rating(html):
+    """(rating text, review count) from an AmbitionBox reviews page"""
+    soup = make_soup(html, parse_only=has_class("!text-base", "ml-1.5"))
     rating_elements = soup.select(".\\!text-base")
     rating = [el.get_text(strip=True) for el in rating_elements]
     rating=rating[0]
@@ -36,15 +36,15 @@ def extract_review_count(text):
     except ValueError:
         return None
 
-def get_ambitionbox_rating(company_name):
+async def get_ambitionbox_rating(company_name):
     url=get_ambition_url(company_name)
-    rating,reviewcnt=scrape_rating(url)
+    rating,reviewcnt=await scrape_rating(url)
     data={
         "rating" : float(rating),
         "review count" : reviewcnt,
         "url":url
     }
-    return json.dumps(data)
+    return data
 
 
 
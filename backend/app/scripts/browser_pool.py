@@ -0,0 +1,189 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from app.scripts import rate_limiter
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", 2))
+# Restart a browser after this many page loads to keep its memory in check
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", 50))
+# Give up on a page load or injected script after this many seconds instead of hanging the worker
+PAGE_LOAD_TIMEOUT = float(os.getenv("BROWSER_PAGE_LOAD_TIMEOUT", 20))
+SCRIPT_TIMEOUT = float(os.getenv("BROWSER_SCRIPT_TIMEOUT", 10))
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def resolve_driver_path():
+    """Locate (downloading if needed) the chromedriver binary once per process"""
+    global _driver_path
+    if _driver_path is None:
+        with _driver_path_lock:
+            if _driver_path is None:
+                _driver_path = os.getenv("CHROMEDRIVER_PATH") or ChromeDriverManager().install()
+    return _driver_path
+
+
+def chrome_options():
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-infobars")
+    options.add_argument("--disable-extensions")
+    options.add_argument("start-maximized")
+    options.add_experimental_option(
+        "prefs", {"profile.default_content_setting_values.notifications": 1}
+    )
+    options.page_load_strategy = "eager"
+    return options
+
+
+class BrowserSession:
+    """A pooled WebDriver plus the bookkeeping needed to decide when to recycle it"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.broken = False
+
+    def get(self, url):
+        """Load url, paced by the same per-host rate limiter as http_client"""
+        limiter = rate_limiter.wait(url)
+        self.pages += 1
+        try:
+            self.driver.get(url)
+        except WebDriverException:
+            limiter.record(None)
+            raise
+        except BaseException:
+            # e.g. a urllib3 timeout talking to chromedriver: says nothing about the host, but frees a half-open probe
+            limiter.abandon()
+            raise
+        limiter.record(200)
+
+    def open_tab(self, url):
+        """Start loading url in a new background tab without waiting for it"""
+        limiter = rate_limiter.wait(url)
+        self.pages += 1
+        try:
+            self.driver.execute_script("window.open(arguments[0], '_blank');", url)
+        except WebDriverException:
+            limiter.record(None)
+            raise
+        except BaseException:
+            limiter.abandon()
+            raise
+        # The tab loads in the background, so opening it is all we can report on
+        limiter.record(200)
+
+    def is_healthy(self):
+        if self.broken:
+            return False
+        try:
+            self.driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except WebDriverException:
+            pass
+
+
+class BrowserPool:
+    """
+    Bounded pool of warm headless Chrome sessions.
+
+    At most `size` sessions exist at once; borrowers block until one is free.
+    Sessions are health-checked when borrowed, and replaced after `max_pages`
+    page loads or when the borrower hit a WebDriver error.
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE, max_pages=BROWSER_MAX_PAGES):
+        self.size = size
+        self.max_pages = max_pages
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._live = 0
+        self._live_lock = threading.Lock()
+
+    def _new_session(self, limit=None):
+        with self._live_lock:
+            if limit is not None and self._live >= limit:
+                return None
+            self._live += 1
+        try:
+            driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=chrome_options())
+            driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+            driver.set_script_timeout(SCRIPT_TIMEOUT)
+        except Exception:
+            self._discard(None)
+            raise
+        return BrowserSession(driver)
+
+    def _discard(self, browser):
+        if browser is not None:
+            browser.quit()
+        with self._live_lock:
+            self._live -= 1
+
+    def _checkout(self):
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                return self._new_session()
+            if browser.is_healthy():
+                return browser
+            self._discard(browser)
+
+    def _checkin(self, browser):
+        if browser.broken or browser.pages >= self.max_pages:
+            self._discard(browser)
+        else:
+            self._idle.put(browser)
+
+    @contextmanager
+    def session(self):
+        """Borrow a browser for the duration of the with-block"""
+        self._slots.acquire()
+        browser = None
+        try:
+            browser = self._checkout()
+            yield browser
+        except WebDriverException:
+            if browser is not None:
+                browser.broken = True
+            raise
+        finally:
+            if browser is not None:
+                self._checkin(browser)
+            self._slots.release()
+
+    def warm(self):
+        """Resolve the driver and start idle sessions up to the pool size"""
+        resolve_driver_path()
+        while True:
+            browser = self._new_session(limit=self.size)
+            if browser is None:
+                return
+            self._idle.put(browser)
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+browser_pool = BrowserPool()
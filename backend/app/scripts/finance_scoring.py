@@ -0,0 +1,344 @@
+"""
+Vectorized version of the scorers in new_finance.py.
+
+Works on a wide DataFrame of fundamentals with one row per ticker. Columns are
+yfinance statement row labels for the latest period ("Net Income",
+"Total Assets", ...), "<label> (prev)" for the period before it, and the
+has_balance_sheet / has_income_stmt flags. Every branch of the scalar scorers
+is reproduced with masks, so the scores match financial_analysis_score.
+
+A row the statement does not have is NaN with "<label> (reported)" False,
+like safe_get's None. A reported NaN cell is kept: as on the scalar path it
+makes the metrics that read it, and the scores built on them, NaN.
+"""
+import numpy as np
+import pandas as pd
+
+BALANCE_SHEET_ROWS = [
+    'Retained Earnings',
+    'Total Equity Gross Minority Interest',
+    'Stockholders Equity',
+    'Total Assets',
+    'Total Debt',
+    'Long Term Debt And Capital Lease Obligation',
+    'Current Assets',
+    'Current Liabilities',
+    'Working Capital',
+    'Accounts Receivable',
+    'Net Receivables',
+]
+INCOME_STMT_ROWS = [
+    'Net Income',
+    'Total Revenue',
+    'Operating Income',
+    'Gross Profit',
+]
+CASH_FLOW_ROWS = [
+    'Operating Cash Flow',
+]
+# Rows whose previous-period value some scorer compares against
+PREV_PERIOD_ROWS = {
+    'Retained Earnings',
+    'Total Equity Gross Minority Interest',
+    'Stockholders Equity',
+    'Total Revenue',
+}
+
+WEIGHTS = {
+    'profitability': 0.30,
+    'capitalization': 0.30,
+    'coverage': 0.25,
+    'efficiency': 0.075,
+    'cost_structure': 0.075
+}
+
+
+def prev(row_name):
+    return f"{row_name} (prev)"
+
+
+def reported(column):
+    return f"{column} (reported)"
+
+
+# Row labels each statement is read for, in the order of its columns in the wide frame
+STATEMENT_ROWS = (BALANCE_SHEET_ROWS, INCOME_STMT_ROWS, CASH_FLOW_ROWS)
+
+
+def has_data(statement):
+    return statement is not None and 0 not in statement.shape
+
+
+def statement_values(statement, row_names):
+    """
+    (values, rows, periods) for row_names in one statement: a (len(row_names), 2)
+    array of the latest and previous period values (NaN where missing), whether
+    the statement has each row, and how many of the two periods it has.
+    """
+    values = np.full((len(row_names), 2), np.nan)
+    if not has_data(statement):
+        return values, np.zeros(len(row_names), dtype=bool), 0
+    # One array conversion and a dict of row positions per statement, instead of a .loc lookup per cell
+    periods = statement.to_numpy(dtype=np.float64, na_value=np.nan)[:, :2]
+    row_of = dict(zip(statement.index, range(len(statement.index))))
+    positions = np.array([row_of.get(row_name, -1) for row_name in row_names])
+    rows = positions >= 0
+    values[rows, :periods.shape[1]] = periods[positions[rows]]
+    return values, rows, periods.shape[1]
+
+
+def fundamentals_frame(statements):
+    """
+    Build the wide frame from {ticker: (balance_sheet, income_stmt, cash_flow)}.
+
+    Each statement becomes a small array, and the arrays for the whole
+    universe are stacked into the frame's columns at once.
+    """
+    triples = list(statements.values())
+    columns = {}
+    has_periods = []
+    for position, row_names in enumerate(STATEMENT_ROWS):
+        parts = [statement_values(triple[position], row_names) for triple in triples]
+        # (tickers, rows, periods) values, (tickers, rows) presence and each ticker's period count
+        values = np.stack([part[0] for part in parts]) if parts else np.empty((0, len(row_names), 2))
+        rows = np.stack([part[1] for part in parts]) if parts else np.empty((0, len(row_names)), dtype=bool)
+        periods = np.array([part[2] for part in parts], dtype=int)
+        has_periods.append(periods > 0)
+        for i, row_name in enumerate(row_names):
+            columns[row_name] = values[:, i, 0]
+            columns[reported(row_name)] = rows[:, i]
+            if row_name in PREV_PERIOD_ROWS:
+                columns[prev(row_name)] = values[:, i, 1]
+                columns[reported(prev(row_name))] = rows[:, i] & (periods > 1)
+    columns['has_balance_sheet'] = has_periods[0]
+    columns['has_income_stmt'] = has_periods[1]
+    return pd.DataFrame(columns, index=list(statements))
+
+
+def _column(df, name):
+    """(values, found) for a column; found is False where safe_get would return None"""
+    if name in df.columns:
+        return df[name].to_numpy(dtype=np.float64, na_value=np.nan), df[reported(name)].to_numpy(dtype=bool)
+    return np.full(len(df), np.nan), np.zeros(len(df), dtype=bool)
+
+
+def _first_nonzero(a, b):
+    """Vector form of `a or b` on (values, found) pairs; like a Python float, NaN counts as true"""
+    use_a = a[1] & (a[0] != 0)
+    return np.where(use_a, a[0], b[0]), use_a | b[1]
+
+
+def _max0(a):
+    """Vector form of max(0, a), which is 0 for NaN"""
+    return np.where(a > 0, a, 0.0)
+
+
+def _min(a, cap):
+    """Vector form of min(a, cap), which is NaN for NaN"""
+    return np.where(a > cap, cap, a)
+
+
+def _weighted(metrics):
+    """
+    Weighted mean over the metrics present in each row.
+
+    metrics: list of (valid mask, values, weight), in the scalar scorer's order.
+    The arithmetic follows the scalar path: normalize weights, then sum in order.
+    Returns (scores, found): found is False where no metric was valid, as when
+    the scalar scorer returns None. A valid NaN metric makes the score NaN.
+    """
+    n = len(metrics[0][0])
+    weight_sum = np.zeros(n)
+    for valid, _, weight in metrics:
+        weight_sum = weight_sum + np.where(valid, weight, 0.0)
+    any_valid = weight_sum > 0
+    safe_sum = np.where(any_valid, weight_sum, 1.0)
+    score = np.zeros(n)
+    for valid, values, weight in metrics:
+        score = score + np.where(valid, values * (weight / safe_sum), 0.0)
+    return np.where(any_valid, score, np.nan), any_valid
+
+
+def profitability_scores(df):
+    has_income = df['has_income_stmt'].to_numpy(dtype=bool)
+
+    # Balance-sheet-only branch: retained earnings growth, else equity growth
+    re_cur, re_cur_found = _column(df, 'Retained Earnings')
+    re_prev, re_prev_found = _column(df, prev('Retained Earnings'))
+    eq_cur, eq_cur_found = _first_nonzero(_column(df, 'Total Equity Gross Minority Interest'), _column(df, 'Stockholders Equity'))
+    eq_prev, eq_prev_found = _first_nonzero(_column(df, prev('Total Equity Gross Minority Interest')), _column(df, prev('Stockholders Equity')))
+
+    re_valid = re_cur_found & re_prev_found
+    re_prev_abs = np.where(re_prev != 0, np.abs(re_prev), 1.0)
+    re_negative = _max0(_min(np.where(re_prev != 0, 3 * np.exp(re_cur / re_prev_abs), 2), 5))
+    re_growth = np.where(re_prev != 0, (re_cur - re_prev) / re_prev_abs, 0)
+    re_score = np.where(re_cur < 0, re_negative, 5 + 5 * np.tanh(re_growth))
+
+    eq_valid = eq_cur_found & eq_prev_found & (eq_prev != 0)
+    eq_prev_safe = np.where(eq_prev != 0, eq_prev, 1.0)
+    eq_score = np.where(
+        eq_cur < 0,
+        _max0(3 - np.abs(eq_cur / eq_prev_safe)),
+        5 + 5 * np.tanh((eq_cur - eq_prev) / np.abs(eq_prev_safe)),
+    )
+    balance_only = np.where(re_valid, re_score, np.where(eq_valid, eq_score, np.nan))
+    balance_only_found = re_valid | eq_valid
+
+    # Income statement branch: ROA, ROE and net margin
+    net_income, net_income_found = _column(df, 'Net Income')
+    total_revenue, total_revenue_found = _column(df, 'Total Revenue')
+    total_assets, total_assets_found = _column(df, 'Total Assets')
+
+    roa_valid = net_income_found & total_assets_found & (total_assets != 0)
+    roa = net_income / np.where(total_assets != 0, total_assets, 1.0)
+    roa_score = np.where(roa < 0, _max0(3 + 3 * np.tanh(roa * 5)), 5 + 5 * np.tanh(roa * 5))
+
+    roe_valid = net_income_found & eq_cur_found & (eq_cur != 0)
+    roe = net_income / np.where(eq_cur != 0, eq_cur, 1.0)
+    roe_score = np.select(
+        [(net_income < 0) & (eq_cur < 0), net_income < 0, eq_cur < 0],
+        [1.0, _max0(3 + 3 * np.tanh(roe * 3)), 3.0],
+        5 + 5 * np.tanh(roe * 3),
+    )
+
+    margin_valid = net_income_found & total_revenue_found & (total_revenue != 0)
+    net_margin = net_income / np.where(total_revenue != 0, total_revenue, 1.0)
+    margin_score = np.where(net_margin < 0, _max0(3 + 3 * np.tanh(net_margin * 10)), 5 + 5 * np.tanh(net_margin * 10))
+
+    with_income, with_income_found = _weighted([
+        (roa_valid, roa_score, 0.35),
+        (roe_valid, roe_score, 0.35),
+        (margin_valid, margin_score, 0.30),
+    ])
+    # A loss caps profitability at 4
+    with_income = np.where(net_income < 0, _min(with_income, 4.0), with_income)
+
+    return np.where(has_income, with_income, balance_only), np.where(has_income, with_income_found, balance_only_found)
+
+
+def capitalization_scores(df):
+    total_assets, total_assets_found = _column(df, 'Total Assets')
+    total_equity, total_equity_found = _first_nonzero(_column(df, 'Total Equity Gross Minority Interest'), _column(df, 'Stockholders Equity'))
+    total_debt, total_debt_found = _first_nonzero(_column(df, 'Total Debt'), _column(df, 'Long Term Debt And Capital Lease Obligation'))
+    current_assets, current_assets_found = _column(df, 'Current Assets')
+    current_liabilities, current_liabilities_found = _column(df, 'Current Liabilities')
+    working_capital, working_capital_found = _first_nonzero(
+        _column(df, 'Working Capital'),
+        (current_assets - current_liabilities, current_assets_found & current_liabilities_found),
+    )
+
+    assets_ok = total_assets_found & (total_assets != 0)
+    assets_safe = np.where(total_assets != 0, total_assets, 1.0)
+
+    equity_to_assets = total_equity / assets_safe
+    equity_score = np.where(equity_to_assets < 0, 2 * np.tanh(equity_to_assets), 5 + 5 * np.tanh(equity_to_assets * 2))
+    debt_score = 10 - 10 * np.tanh(total_debt / assets_safe)
+    wc_score = 5 + 5 * np.tanh((working_capital / assets_safe) * 3)
+
+    return _weighted([
+        (assets_ok & total_equity_found, equity_score, 0.40),
+        (assets_ok & total_debt_found, debt_score, 0.30),
+        (assets_ok & working_capital_found, wc_score, 0.30),
+    ])
+
+
+def coverage_scores(df):
+    has_income = df['has_income_stmt'].to_numpy(dtype=bool)
+    total_debt, total_debt_found = _first_nonzero(_column(df, 'Total Debt'), _column(df, 'Long Term Debt And Capital Lease Obligation'))
+    current_liabilities, current_liabilities_found = _column(df, 'Current Liabilities')
+    operating_income, operating_income_found = _column(df, 'Operating Income')
+    net_income, net_income_found = _column(df, 'Net Income')
+    operating_cash_flow, operating_cash_flow_found = _column(df, 'Operating Cash Flow')
+
+    debt_income_valid = total_debt_found & net_income_found & (net_income != 0)
+    debt_to_income = total_debt / np.where(net_income != 0, net_income, 1.0)
+    debt_income_score = np.where(net_income < 0, 2.0, 10 - 5 * np.tanh(debt_to_income / 5))
+
+    liabilities_valid = operating_income_found & current_liabilities_found & (current_liabilities != 0)
+    liabilities_score = 5 + 5 * np.tanh(operating_income / np.where(current_liabilities != 0, current_liabilities, 1.0))
+
+    cf_valid = operating_cash_flow_found & total_debt_found & (total_debt != 0)
+    cf_score = 5 + 5 * np.tanh((operating_cash_flow / np.where(total_debt != 0, total_debt, 1.0)) * 2)
+
+    scores, found = _weighted([
+        (debt_income_valid, debt_income_score, 0.35),
+        (liabilities_valid, liabilities_score, 0.35),
+        (cf_valid, cf_score, 0.30),
+    ])
+    return scores, has_income & found
+
+
+def efficiency_scores(df):
+    has_income = df['has_income_stmt'].to_numpy(dtype=bool)
+    total_assets, total_assets_found = _column(df, 'Total Assets')
+    total_revenue, total_revenue_found = _column(df, 'Total Revenue')
+    prev_revenue, prev_revenue_found = _column(df, prev('Total Revenue'))
+    accounts_receivable, accounts_receivable_found = _first_nonzero(_column(df, 'Accounts Receivable'), _column(df, 'Net Receivables'))
+
+    turnover_valid = total_revenue_found & total_assets_found & (total_assets != 0)
+    asset_turnover = total_revenue / np.where(total_assets != 0, total_assets, 1.0)
+    turnover_score = 5 + 5 * np.tanh(asset_turnover - 0.5)
+
+    ar_valid = total_revenue_found & accounts_receivable_found & (accounts_receivable != 0)
+    ar_turnover = total_revenue / np.where(accounts_receivable != 0, accounts_receivable, 1.0)
+    ar_score = 5 + 5 * np.tanh((ar_turnover - 6) / 5)
+
+    growth_valid = total_revenue_found & prev_revenue_found & (prev_revenue != 0)
+    revenue_growth = (total_revenue - prev_revenue) / np.where(prev_revenue != 0, prev_revenue, 1.0)
+    growth_score = 5 + 5 * np.tanh(revenue_growth * 5)
+
+    scores, found = _weighted([
+        (turnover_valid, turnover_score, 0.50),
+        (ar_valid, ar_score, 0.25),
+        (growth_valid, growth_score, 0.25),
+    ])
+    return scores, has_income & found
+
+
+def cost_structure_scores(df):
+    has_income = df['has_income_stmt'].to_numpy(dtype=bool)
+    total_revenue, total_revenue_found = _column(df, 'Total Revenue')
+    revenue_ok = total_revenue_found & (total_revenue != 0)
+    revenue_safe = np.where(total_revenue != 0, total_revenue, 1.0)
+    gross_profit, gross_profit_found = _column(df, 'Gross Profit')
+    operating_income, operating_income_found = _column(df, 'Operating Income')
+    net_income, net_income_found = _column(df, 'Net Income')
+
+    scores, found = _weighted([
+        (revenue_ok & gross_profit_found, 5 + 5 * np.tanh((gross_profit / revenue_safe - 0.3) * 5), 0.40),
+        (revenue_ok & operating_income_found, 5 + 5 * np.tanh((operating_income / revenue_safe - 0.1) * 10), 0.30),
+        (revenue_ok & net_income_found, 5 + 5 * np.tanh((net_income / revenue_safe - 0.05) * 15), 0.30),
+    ])
+    return scores, has_income & found
+
+
+def score_fundamentals(df):
+    """
+    Score every row of a wide fundamentals frame in one pass.
+
+    Returns a DataFrame indexed like `df` with the same fields as
+    financial_analysis_score, NaN where the scalar path gives None or NaN;
+    rows without a balance sheet are all NaN.
+    """
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        components = {
+            'profitability': profitability_scores(df),
+            'capitalization': capitalization_scores(df),
+            'coverage': coverage_scores(df),
+            'efficiency': efficiency_scores(df),
+            'cost_structure': cost_structure_scores(df),
+        }
+        rating, _ = _weighted([
+            (found, scores, WEIGHTS[name]) for name, (scores, found) in components.items()
+        ])
+
+    has_balance = df['has_balance_sheet'].to_numpy(dtype=bool)
+    result = pd.DataFrame(
+        {
+            'rating': rating,
+            **{f"{name}_score": np.where(found, scores, np.nan) for name, (scores, found) in components.items()},
+        },
+        index=df.index,
+    )
+    result.loc[~has_balance] = np.nan
+    return result
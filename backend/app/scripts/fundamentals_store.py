@@ -0,0 +1,150 @@
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+import yfinance as yf
+from app.db import connect
+from app import executors
+
+DAY = 24 * 60 * 60
+
+STATEMENTS = ("balance_sheet", "income_stmt", "cashflow")
+
+# Annual reports land some weeks after the fiscal year closes
+FILING_LAG = timedelta(days=int(os.getenv("FUNDAMENTALS_FILING_LAG_DAYS", 60)))
+# Never ask upstream more often than this, even when a new period is due
+RECHECK_INTERVAL = float(os.getenv("FUNDAMENTALS_RECHECK_HOURS", 24)) * 60 * 60
+# Refetch regardless after this long, to pick up restatements
+MAX_AGE = float(os.getenv("FUNDAMENTALS_MAX_AGE_DAYS", 120)) * DAY
+
+
+async def download_statements(ticker_symbol):
+    """Fetch all three annual statements from yfinance concurrently, on the network executor"""
+    ticker = yf.Ticker(ticker_symbol)
+    frames = await asyncio.gather(*(executors.run("network", getattr, ticker, name) for name in STATEMENTS))
+    return dict(zip(STATEMENTS, frames))
+
+
+class FundamentalsStore:
+    """
+    Local copy of yfinance annual statements, keyed by (ticker, statement, fiscal period).
+
+    Statements only change when a company files, so reads are served from
+    SQLite and upstream is only asked again once a new fiscal period is
+    likely to have been published.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = connect(db_path)
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS statements (
+                ticker TEXT NOT NULL,
+                statement TEXT NOT NULL,
+                period TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (ticker, statement, period)
+            );
+            CREATE TABLE IF NOT EXISTS refreshes (
+                ticker TEXT PRIMARY KEY,
+                fetched_at REAL NOT NULL,
+                latest_period TEXT
+            );"""
+        )
+        self._conn.commit()
+
+    def needs_refresh(self, ticker_symbol, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, latest_period FROM refreshes WHERE ticker = ?",
+                (ticker_symbol,),
+            ).fetchone()
+        if row is None:
+            return True
+        fetched_at, latest_period = row
+        if now - fetched_at > MAX_AGE:
+            return True
+        if now - fetched_at < RECHECK_INTERVAL:
+            return False
+        if latest_period is None:
+            return True
+        next_period_due = datetime.fromisoformat(latest_period) + timedelta(days=365) + FILING_LAG
+        return datetime.fromtimestamp(now) >= next_period_due
+
+    def save(self, ticker_symbol, statements):
+        """Upsert every period of the fetched statements and record when we fetched them"""
+        now = time.time()
+        rows = []
+        periods = []
+        for name, frame in statements.items():
+            if frame is None or frame.empty:
+                continue
+            for column in frame.columns:
+                period = pd.Timestamp(column).date().isoformat()
+                periods.append(period)
+                data = {
+                    str(row_name): (None if value is None or (isinstance(value, float) and math.isnan(value)) else float(value))
+                    for row_name, value in frame[column].items()
+                }
+                rows.append((ticker_symbol, name, period, json.dumps(data)))
+        latest_period = max(periods) if periods else None
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO statements (ticker, statement, period, data) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute(
+                """INSERT INTO refreshes (ticker, fetched_at, latest_period) VALUES (?, ?, ?)
+                ON CONFLICT(ticker) DO UPDATE SET
+                    fetched_at = excluded.fetched_at,
+                    latest_period = COALESCE(excluded.latest_period, refreshes.latest_period)""",
+                (ticker_symbol, now, latest_period),
+            )
+            self._conn.commit()
+
+    def load(self, ticker_symbol):
+        """Rebuild {statement: DataFrame} with the latest period in the first column"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT statement, period, data FROM statements WHERE ticker = ? ORDER BY period DESC",
+                (ticker_symbol,),
+            ).fetchall()
+        columns = {name: {} for name in STATEMENTS}
+        for name, period, data in rows:
+            columns[name][pd.Timestamp(period)] = json.loads(data)
+        return {
+            name: pd.DataFrame(periods, dtype="float64") if periods else pd.DataFrame()
+            for name, periods in columns.items()
+        }
+
+    async def get(self, ticker_symbol):
+        """Statements for a ticker, refreshing from yfinance only when a new period is likely"""
+        if await executors.run("network", self.needs_refresh, ticker_symbol):
+            try:
+                statements = await download_statements(ticker_symbol)
+                await executors.run("network", self.save, ticker_symbol, statements)
+            except Exception as e:
+                # Serve whatever we already have rather than failing the lookup
+                print(f"Could not refresh statements for {ticker_symbol}: {str(e)}")
+        return await executors.run("network", self.load, ticker_symbol)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                db_path = os.getenv("FUNDAMENTALS_DB_PATH", os.path.join("output", "fundamentals.db"))
+                os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+                _store = FundamentalsStore(db_path)
+    return _store
@@ -1,28 +1,21 @@
-import json
 from pygooglenews import GoogleNews
-import pandas as pd
-import re
 import numpy as np
 from statistics import mean
-import os
 import time
+from app.scripts.lexicon import LEXICON_CSV_PATH
+from app.scripts.sentiment import lm_polarity
 
 
 def getNews(topic):
     gn=GoogleNews()
     #time.sleep(0.370975434567898765445678)
     search=gn.search(topic)
-    return json.dumps(search)
+    return search
 
 
-def analyze_headlines(json_string, lmd_csv_path):
-    lmd_df = pd.read_csv(lmd_csv_path, sep=',')
-    positive_words = set(lmd_df[lmd_df['Positive'] > 0]['Word'].str.lower())
-    negative_words = set(lmd_df[lmd_df['Negative'] > 0]['Word'].str.lower())
-    data = json.loads(json_string)
-    articles = data.get('entries', [])
+def analyze_headlines(search, lmd_csv_path=LEXICON_CSV_PATH):
+    articles = search.get('entries', [])
     article_list = []
-    sentiment_scores = []
     for article in articles:
         title = article.get('title', '')
         link = ''
@@ -32,18 +25,17 @@ def analyze_headlines(json_string, lmd_csv_path):
             link = article['links'].get('href', '')
         elif 'link' in article:
             link = article['link']
-        sentiment = analyze_lm_sentiment(title, positive_words, negative_words)
-        sentiment_scores.append(sentiment)
         article_list.append({'title': title, 'link': link})
-    if sentiment_scores:
-        min_score = min(sentiment_scores)
-        max_score = max(sentiment_scores)
+    sentiment_scores = lm_polarity([article['title'] for article in article_list], lmd_csv_path)
+    if len(sentiment_scores):
+        min_score = sentiment_scores.min()
+        max_score = sentiment_scores.max()
         
         if max_score - min_score == 0:
-            normalized_scores = [5.0] * len(sentiment_scores)
+            rating = 5.0
         else:
-            normalized_scores = [(s - min_score) / (max_score - min_score) * 10 for s in sentiment_scores]
-        rating = np.mean(normalized_scores)
+            normalized_scores = (sentiment_scores - min_score) / (max_score - min_score) * 10
+            rating = float(np.mean(normalized_scores))
     else:
         rating = 5.0
     output = {
@@ -51,27 +43,13 @@ def analyze_headlines(json_string, lmd_csv_path):
         'articles': article_list
     }
     
-    return json.dumps(output, indent=2)
+    return output
 
 
-def analyze_lm_sentiment(text, positive_words, negative_words):
-    words = re.findall(r'\b\w+\b', text.lower())
-    positive_count = sum(1 for word in words if word in positive_words)
-    negative_count = sum(1 for word in words if word in negative_words)
-    total_sentiment_words = positive_count + negative_count
-    if total_sentiment_words > 0:
-        lm_polarity = (positive_count - negative_count) / total_sentiment_words
-    else:
-        lm_polarity = 0
-    
-    return lm_polarity
-
 def fetch_news_rating(company_name):
     topic=company_name+" company"
-    json_string = getNews(topic)
-    script_dir = os.path.dirname(__file__)
-    lmd_csv_path = os.path.join(script_dir,'../loughran-mcdonald.csv')
-    result = analyze_headlines(json_string, lmd_csv_path)
+    search = getNews(topic)
+    result = analyze_headlines(search)
     return result
 
 
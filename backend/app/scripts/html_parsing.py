@@ -0,0 +1,27 @@
+import importlib.util
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml's C parser is several times faster than the pure-Python html.parser
+FAST_PARSER_AVAILABLE = importlib.util.find_spec("lxml") is not None
+PARSER = "lxml" if FAST_PARSER_AVAILABLE else "html.parser"
+
+
+def make_soup(html, parse_only=None):
+    """
+    Parse html with the fastest available parser.
+
+    parse_only (a SoupStrainer) keeps only matching tags and their
+    descendants, which skips building the rest of a large page.
+    """
+    return BeautifulSoup(html, PARSER, parse_only=parse_only)
+
+
+def has_class(*class_names):
+    """Strainer matching any tag carrying one of the given classes"""
+    wanted = set(class_names)
+    return SoupStrainer(class_=lambda value: value is not None and bool(wanted & set(value.split())))
+
+
+def tags(*names):
+    """Strainer matching tags by name, e.g. tags("table")"""
+    return SoupStrainer(list(names))
@@ -0,0 +1,132 @@
+import asyncio
+import importlib.util
+import os
+import threading
+import weakref
+
+import httpx
+from app.scripts import rate_limiter
+
+# Shared by every scraper so upstreams see one consistent browser-like client
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36'
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 20))
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+# Retries after a 429/503, each waiting out the host's backoff first
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 2))
+
+# HTTP/2 needs the optional h2 package
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Catch this to handle failed requests, including ones refused by the rate limiter
+HTTPError = (httpx.HTTPError, rate_limiter.HostUnavailable)
+
+_sync_client = None
+_sync_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _client_options():
+    return {
+        "headers": {"User-Agent": USER_AGENT},
+        "timeout": httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        "limits": httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        "http2": HTTP2_AVAILABLE,
+        "follow_redirects": True,
+    }
+
+
+def get_client():
+    """Process-wide blocking client; connections are pooled per host and kept alive"""
+    global _sync_client
+    if _sync_client is None:
+        with _sync_lock:
+            if _sync_client is None:
+                _sync_client = httpx.Client(**_client_options())
+    return _sync_client
+
+
+def get_async_client():
+    """Pooled async client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(**_client_options())
+        _async_clients[loop] = client
+    return client
+
+
+def _record(limiter, response):
+    retry_after = rate_limiter.retry_after_seconds(response.headers.get("Retry-After"))
+    limiter.record(response.status_code, retry_after)
+    return response.status_code in rate_limiter.BACKOFF_STATUSES
+
+
+def get(url, **kwargs):
+    """
+    GET through the shared client, paced by the per-host rate limiter.
+
+    429 and 503 responses are retried up to MAX_RETRIES times after the host's
+    backoff; the last response is returned if the host is still refusing.
+    """
+    response = None
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            limiter = rate_limiter.wait(url)
+        except rate_limiter.HostUnavailable:
+            if response is not None:
+                return response
+            raise
+        try:
+            response = get_client().get(url, **kwargs)
+        except httpx.TransportError:
+            limiter.record(None)
+            raise
+        except BaseException:
+            limiter.abandon()
+            raise
+        if not _record(limiter, response):
+            return response
+    return response
+
+
+async def aget(url, **kwargs):
+    """Async counterpart of get()"""
+    response = None
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            limiter = await rate_limiter.await_slot(url)
+        except rate_limiter.HostUnavailable:
+            if response is not None:
+                return response
+            raise
+        try:
+            response = await get_async_client().get(url, **kwargs)
+        except httpx.TransportError:
+            limiter.record(None)
+            raise
+        except BaseException:
+            limiter.abandon()
+            raise
+        if not _record(limiter, response):
+            return response
+    return response
+
+
+async def aclose():
+    """Close the pooled clients; called on application shutdown"""
+    global _sync_client
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+    with _sync_lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
@@ -1,61 +1,149 @@
-import json
+import asyncio
+import os
+import re
 import time
 from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
-
-def scrape_indiankanoon(company_name, max_pages):
+from app.scripts.html_parsing import make_soup, has_class
+from app.scripts import http_client
+from app.cache import get_result_cache
+from app import executors
+
+CRAWL_CONCURRENCY = int(os.getenv("KANOON_CRAWL_CONCURRENCY", 4))
+
+def parse_result_titles(html):
+    """(headline, judgment url) for each hit on a search results page"""
+    soup = make_soup(html, parse_only=has_class('result_title'))
+    return [(result.text.strip(), 'https://indiankanoon.org' + result['href']) for result in soup.select('.result_title a')]
+
+def extract_judgment_content(html):
+    judgment_soup = make_soup(html, parse_only=has_class('judgments', 'expanded_headline'))
+    judgment_content = judgment_soup.select_one('.judgments') or judgment_soup.select_one('.expanded_headline')
+    if judgment_content:
+        return ' '.join(judgment_content.stripped_strings)
+    return None
+
+async def crawl_indiankanoon(company_name, max_pages, years=None, with_content=False):
+    """
+    Yield judgment records for a company as they are found.
+
+    Result pages (and, with with_content, judgment pages) are fetched by at
+    most CRAWL_CONCURRENCY workers, paced by http_client's indiankanoon.org rate limit.
+    Headline-only crawls never download judgment bodies.
+    """
     current_year = datetime.now().year
-    years = [current_year, current_year - 1]
-    results = []
-    index_counter = 1
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36'
-    }
+    years = years or [current_year, current_year - 1]
     company_name=company_name.replace(" ","+")
-
-    for year in years:
-        for page in range(max_pages):
-            search_url = f"https://indiankanoon.org/search/?formInput={company_name}%20%20%20doctypes%3A%20judgments%20year%3A%20{year}&pagenum={page}"
-            
-            try:
-
-                response = requests.get(search_url, headers=headers)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                for result in soup.select('.result_title a'):
-                    result_title = result.text.strip()
-                    result_url = 'https://indiankanoon.org' + result['href']
-                    
-                    judgment_response = requests.get(result_url, headers=headers)
-                    judgment_soup = BeautifulSoup(judgment_response.text, 'html.parser')
-                    
-                    judgment_content = judgment_soup.select_one('.judgments') or judgment_soup.select_one('.expanded_headline')
-                    
-                    if judgment_content:
-                        content = ' '.join(judgment_content.stripped_strings)
-                        results.append({
-                            "index": index_counter,
-                            "year": year,
-                            "headline": result_title,
-                            #"content": content,
-                            "url": result_url
-                        })
-                        index_counter += 1
-
-            except requests.exceptions.RequestException as e:
-                print(f"Error fetching page {page} for {year}: {e}")
-                continue
-
-    # with open(output_path, 'w', encoding='utf-8') as f:
-    #     json.dump(results, f, ensure_ascii=False, indent=2)
-    return json.dumps(results, ensure_ascii=True, indent=2)
+    workers = asyncio.Semaphore(CRAWL_CONCURRENCY)
+    found = asyncio.Queue()
+
+    async def fetch(url):
+        async with workers:
+            response = await http_client.aget(url)
+            response.raise_for_status()
+            return response.text
+
+    async def crawl_judgment(year, result_title, result_url):
+        try:
+            html = await fetch(result_url)
+        except http_client.HTTPError as e:
+            print(f"Error fetching judgment {result_url}: {e}")
+            return
+        content = await executors.run("cpu", extract_judgment_content, html)
+        if content:
+            found.put_nowait({"year": year, "headline": result_title, "content": content, "url": result_url})
+
+    async def crawl_page(year, page):
+        search_url = f"https://indiankanoon.org/search/?formInput={company_name}%20%20%20doctypes%3A%20judgments%20year%3A%20{year}&pagenum={page}"
+        try:
+            html = await fetch(search_url)
+        except http_client.HTTPError as e:
+            print(f"Error fetching page {page} for {year}: {e}")
+            return
+        hits = await executors.run("cpu", parse_result_titles, html)
+        if not with_content:
+            for result_title, result_url in hits:
+                found.put_nowait({"year": year, "headline": result_title, "url": result_url})
+            return
+        await asyncio.gather(*(crawl_judgment(year, result_title, result_url) for result_title, result_url in hits))
+
+    pages = [asyncio.create_task(crawl_page(year, page)) for year in years for page in range(max_pages)]
+    done = asyncio.gather(*pages)
+    done.add_done_callback(lambda _: found.put_nowait(None))
+    index_counter = 1
+    try:
+        while True:
+            record = await found.get()
+            if record is None:
+                break
+            yield {"index": index_counter, **record}
+            index_counter += 1
+        if done.exception() is not None:
+            raise done.exception()
+    finally:
+        done.cancel()
+
+def scrape_indiankanoon(company_name, max_pages, with_content=False):
+    """Blocking wrapper around crawl_indiankanoon returning all records"""
+    async def collect():
+        return [record async for record in crawl_indiankanoon(company_name, max_pages, with_content=with_content)]
+
+    results = asyncio.run(collect())
+    return results
 
 def clamp(value, min_value, max_value):
   return max(min_value, min(value, max_value))
 
-def indiankanoon_metric(company_name):
+# "1 - 10 of 234" in the results header; the total is all we need from the page
+COUNT_PATTERN = re.compile(r'<b>\s*[\d,]+\s*-\s*[\d,]+\s+of\s+(?:about\s+)?([\d,]+)\s*</b>')
+# Shown instead of the header when a search really has no hits
+NO_RESULTS_PATTERN = re.compile(r'No\s+matching\s+results', re.IGNORECASE)
+
+JUDGMENTS = "judgments"
+HIGH_COURTS_SC = "highcourts,sc"
+
+CURRENT_YEAR_COUNT_TTL = 12 * 60 * 60
+# Counts for years that are over barely move, so keep them for a long time
+PAST_YEAR_COUNT_TTL = 365 * 24 * 60 * 60
+
+# Also fetch high court / supreme court counts and apply the HCSCP factor
+FULL_METRIC = os.getenv("KANOON_FULL_METRIC", "").lower() in ("1", "true", "yes")
+
+def count_url(company_name, year, doctype):
+    company_name=company_name.replace(" ","+")
+    if doctype == JUDGMENTS:
+        return f"https://indiankanoon.org/search/?formInput={company_name}%20%20%20doctypes%3A%20judgments%20year%3A%20{year}"
+    return f"https://indiankanoon.org/search/?formInput={company_name}%20%20%20%20%20%20%20doctypes%3A%20highcourts%2Csc+year:{year}"
+
+def parse_case_count(html):
+    """
+    Total hits from a search results page.
+
+    Raises ValueError when the page is neither a results page nor an empty
+    search (a captcha or throttle page, or a changed layout), so it is not
+    mistaken for a company with no cases.
+    """
+    match = COUNT_PATTERN.search(html)
+    if match:
+        return int(match.group(1).replace(",", ""))
+    if NO_RESULTS_PATTERN.search(html):
+        return 0
+    raise ValueError("No result count on the Indian Kanoon search page")
+
+async def fetch_case_count(company_name, year, doctype):
+    """Number of search hits for one (company, year, doctype), cached"""
+    cache = get_result_cache()
+    key = f"{company_name}|{year}|{doctype}"
+    count = await executors.run("network", cache.get, "legal_count", key)
+    if count is not None:
+        return count
+    response = await http_client.aget(count_url(company_name, year, doctype))
+    response.raise_for_status()
+    count = parse_case_count(response.text)
+    ttl = PAST_YEAR_COUNT_TTL if year < datetime.now().year else CURRENT_YEAR_COUNT_TTL
+    await executors.run("network", cache.set, "legal_count", key, count, ttl)
+    return count
+
+async def indiankanoon_metric(company_name):
     '''
     METRIC:
         if no cases: full 10(ensure the page loaded though)
@@ -68,81 +156,31 @@ def indiankanoon_metric(company_name):
     2. xp = cases last year
     3. current_month
     4. hsc=cases in high court or supreme court over last 2 years
+
+    All counts are fetched concurrently, so HCSCP (KANOON_FULL_METRIC) costs no extra latency.
+    HTTP errors and unreadable pages propagate, so a failed lookup is reported (and not cached) as one.
     '''
     current_year=datetime.now().year
     current_month=datetime.now().month
-    company_name=company_name.replace(" ","+")
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36'
-    }
-    xc_url = f"https://indiankanoon.org/search/?formInput={company_name}%20%20%20doctypes%3A%20judgments%20year%3A%20{current_year}"
-    xp_url = f"https://indiankanoon.org/search/?formInput={company_name}%20%20%20doctypes%3A%20judgments%20year%3A%20{current_year-1}"
-    #xpp_url= f"https://indiankanoon.org/search/?formInput={company_name}%20%20%20doctypes%3A%20judgments%20year%3A%20{current_year-2}"
-    hsc1_url=f"https://indiankanoon.org/search/?formInput={company_name}%20%20%20%20%20%20%20doctypes%3A%20highcourts%2Csc+year:{current_year}"
-    hsc2_url=f"https://indiankanoon.org/search/?formInput={company_name}%20%20%20%20%20%20%20doctypes%3A%20highcourts%2Csc+year:{current_year-1}"
-    try:
-        response = requests.get(xc_url, headers=headers)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        xc = None
-        for result in soup.select('#search-form+ div b'):
-            xc=result.text.split("of")[1].strip()
-        if not xc:
-            for result in soup.select('.didyoumean + div b'):
-                xc=result.text.split("of")[1].strip()
-        response = requests.get(xp_url, headers=headers)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        xc=int(xc)
-        xp = None
-        for result in soup.select('#search-form+ div b'):
-            xp=result.text.split("of")[1].strip()
-        if not xp:
-            for result in soup.select('.didyoumean + div b'):
-                xp=result.text.split("of")[1].strip()
-        xp=int(xp)
-
-        # response = requests.get(xpp_url, headers=headers)
-        # response.raise_for_status()
-        # soup = BeautifulSoup(response.text, 'html.parser')
-        # xpp = None
-        # for result in soup.select('#search-form+ div b'):
-        #     xpp=result.text.split("of")[1].strip()
-        # if not xpp:
-        #     for result in soup.select('.didyoumean + div b'):
-        #         xpp=result.text.split("of")[1].strip()
-        # xpp=int(xpp)
-
-        # response = requests.get(hsc1_url, headers=headers)
-        # response.raise_for_status()
-        # soup = BeautifulSoup(response.text, 'html.parser')        
-        # hsc1 = None
-        # for result in soup.select('#search-form+ div b'):
-        #     hsc1=result.text.split("of")[1].strip()
-        # if not hsc1:
-        #     for result in soup.select('.didyoumean + div b'):
-        #         hsc1=result.text.split("of")[1].strip()
-        # response = requests.get(hsc2_url, headers=headers)
-        # response.raise_for_status()
-        # soup = BeautifulSoup(response.text, 'html.parser')
-        # hsc1=int(hsc1)
-        # hsc2 = None
-        # for result in soup.select('#search-form+ div b'):
-        #     hsc2=result.text.split("of")[1].strip()
-        # if not hsc2:
-        #     for result in soup.select('.didyoumean + div b'):
-        #         hsc2=result.text.split("of")[1].strip()
-        # hsc2=int(hsc2)
-        # hsc=hsc1+hsc2
-        # HCSCP=clamp((1-(hsc/(xp+xc))), 0.01,10)
-        #PYCGR=0.5*(1-clamp(((xc*12/current_month-xpp)/xpp),-1,1))
-        YCGR=0.5*(1-clamp(((xc*12/current_month-xp)/xp),-1,1))
+    queries = [(current_year, JUDGMENTS), (current_year-1, JUDGMENTS)]
+    if FULL_METRIC:
+        queries += [(current_year, HIGH_COURTS_SC), (current_year-1, HIGH_COURTS_SC)]
+    counts = await asyncio.gather(*(fetch_case_count(company_name, year, doctype) for year, doctype in queries))
+
+    xc, xp = counts[0], counts[1]
+    if xc + xp == 0:
+        return 10
+    # No cases last year but some this year counts as maximal growth
+    growth = (xc*12/current_month-xp)/xp if xp else 1
+    YCGR=0.5*(1-clamp(growth,-1,1))
+    if not FULL_METRIC:
         return 10*YCGR
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching page : {e}")
+    hsc = counts[2] + counts[3]
+    HCSCP=clamp((1-(hsc/(xp+xc))), 0.01,10)
+    return 10*HCSCP*YCGR
 
-def fetch_indiankanoon_final(company_name):
-    rating=indiankanoon_metric(company_name)
+async def fetch_indiankanoon_final(company_name):
+    rating=await indiankanoon_metric(company_name)
     company_name=company_name.replace(" ","+")
     url=f"https://indiankanoon.org/search/?formInput={company_name}"
     #content=scrape_indiankanoon(company_name,1)
@@ -151,7 +189,7 @@ def fetch_indiankanoon_final(company_name):
        # "articles" : content,
        "url" : url
     }
-    return json.dumps(result)
+    return result
 
         
         
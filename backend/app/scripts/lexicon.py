@@ -0,0 +1,58 @@
+import csv
+import os
+import pickle
+from functools import lru_cache
+from types import MappingProxyType
+
+script_dir = os.path.dirname(__file__)
+LEXICON_CSV_PATH = os.path.normpath(os.path.join(script_dir, '../loughran-mcdonald.csv'))
+
+# Polarity codes; a word the dictionary flags as both counts once on each side
+POSITIVE = 1
+NEGATIVE = -1
+BOTH = 0
+
+
+def parse_lexicon_csv(csv_path):
+    """Read the Loughran-McDonald CSV into a {word: polarity} dict of sentiment words only"""
+    lexicon = {}
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            positive = float(row['Positive'] or 0) > 0
+            negative = float(row['Negative'] or 0) > 0
+            if positive and negative:
+                lexicon[row['Word'].lower()] = BOTH
+            elif positive:
+                lexicon[row['Word'].lower()] = POSITIVE
+            elif negative:
+                lexicon[row['Word'].lower()] = NEGATIVE
+    return lexicon
+
+
+def pickle_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + '.pkl'
+
+
+@lru_cache(maxsize=None)
+def load_lexicon(csv_path=LEXICON_CSV_PATH):
+    """
+    Immutable word -> polarity mapping, parsed once per process.
+
+    A pickled copy is kept next to the CSV and reused while it is newer than
+    the CSV, so restarts skip the parse too.
+    """
+    pickle_path = pickle_path_for(csv_path)
+    try:
+        if os.path.getmtime(pickle_path) >= os.path.getmtime(csv_path):
+            with open(pickle_path, 'rb') as f:
+                return MappingProxyType(pickle.load(f))
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+
+    lexicon = parse_lexicon_csv(csv_path)
+    try:
+        with open(pickle_path, 'wb') as f:
+            pickle.dump(lexicon, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print(f"Could not write lexicon cache {pickle_path}: {e}")
+    return MappingProxyType(lexicon)
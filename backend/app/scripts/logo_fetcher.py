@@ -1,21 +1,53 @@
-import wikipedia
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+from urllib.parse import unquote, urlparse
+from app.scripts.html_parsing import make_soup, tags
+from app.scripts import http_client
+from app.scripts.logo_store import IMAGE_CACHE_ENABLED, get_logo_store, image_url, store_image
+from app.cache import normalize_company_name
+from app import executors
 
-def retrieve_logo(company_name):
-    results=wikipedia.search(company_name)
-    print(results[0])
-    # page=wikipedia.page(results[0])
-    # print(page.url)
-    base=results[0].replace(" ","_")
-    url=f"https://en.wikipedia.org/wiki/{base}"
-    print(url)
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36'
-    }
-    response = requests.get(url, headers=headers)
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+
+
+def lookup_page_image(company_name):
+    """
+    Search Wikipedia and read the top result's page image in one API call.
+
+    Returns (article title, image URL); either may be None.
+    """
+    response = http_client.get(WIKIPEDIA_API_URL, params={
+        "action": "query",
+        "format": "json",
+        "formatversion": 2,
+        "generator": "search",
+        "gsrsearch": company_name,
+        "gsrlimit": 1,
+        "prop": "pageimages",
+        "piprop": "original",
+        # Company logos are usually non-free files, which pageimages skips by default
+        "pilicense": "any",
+        "redirects": 1,
+    })
+    response.raise_for_status()
+    pages = response.json().get("query", {}).get("pages", [])
+    if not pages:
+        return None, None
+    page = pages[0]
+    return page.get("title"), page.get("original", {}).get("source")
+
+
+def scrape_infobox_logo(title):
+    """Fallback when the page image is not a logo: read the logo from the infobox HTML"""
+    url = f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+    response = http_client.get(url)
     response.raise_for_status()
-    soup = BeautifulSoup(response.text, 'html.parser')
+    return parse_infobox_logo(response.text)
+
+
+def parse_infobox_logo(html):
+    """Logo URL from a Wikipedia article's infobox, or None"""
+    # Every selector below looks inside tables (the infobox), so skip the article body
+    soup = make_soup(html, parse_only=tags('table'))
     ans=None
     for result in soup.select('.logo .mw-file-element'):
         ans=result['src']
@@ -32,6 +64,58 @@ def retrieve_logo(company_name):
     except:
         pass
     if ans:
-        ans=f"https:{ans}"
-        return ans
-    return None
\ No newline at end of file
+        return f"https:{ans}" if ans.startswith("//") else ans
+    return None
+
+
+def cache_image(url):
+    """Download the logo into the local image cache and return its local URL, or the original on failure"""
+    try:
+        response = http_client.get(url)
+        response.raise_for_status()
+        return image_url(store_image(response.content, url, response.headers.get("content-type")))
+    except Exception as e:
+        print(f"Could not cache logo image {url}: {str(e)}")
+        return url
+
+
+def looks_like_logo(url):
+    """Whether an image file looks like a logo rather than a photo (e.g. of the headquarters)"""
+    file_name = unquote(urlparse(url).path.rsplit("/", 1)[-1]).lower()
+    return "logo" in file_name or ".svg" in file_name
+
+
+def resolve_logo(company_name):
+    title, logo = lookup_page_image(company_name)
+    # The page image is the article's lead image, which for many companies is a photo
+    if title and not (logo and looks_like_logo(logo)):
+        logo = scrape_infobox_logo(title)
+    if logo and IMAGE_CACHE_ENABLED:
+        logo = cache_image(logo)
+    return logo
+
+
+def retrieve_logo(company_name):
+    store = get_logo_store()
+    company_key = normalize_company_name(company_name)
+    found, logo = store.lookup(company_key)
+    if found:
+        return logo
+    logo = resolve_logo(company_name)
+    store.save(company_key, logo)
+    return logo
+
+
+async def prewarm_logos(company_names, max_workers=8):
+    """Resolve logos for many companies up front, max_workers at a time on the network executor; returns {company: logo URL or None}"""
+    slots = asyncio.Semaphore(max_workers)
+
+    async def resolve(company_name):
+        try:
+            async with slots:
+                return await executors.run("network", retrieve_logo, company_name)
+        except Exception as e:
+            print(f"Could not prewarm logo for {company_name}: {str(e)}")
+            return None
+
+    return dict(zip(company_names, await asyncio.gather(*(resolve(name) for name in company_names))))
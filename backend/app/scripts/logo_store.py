@@ -0,0 +1,111 @@
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from app.db import connect
+
+DAY = 24 * 60 * 60
+
+# Companies without a logo are looked up again after this long
+MISS_RETRY_INTERVAL = float(os.getenv("LOGO_MISS_RETRY_DAYS", 7)) * DAY
+# Resolved logos are re-resolved after this long, in case the article changed
+MAX_AGE = float(os.getenv("LOGO_MAX_AGE_DAYS", 180)) * DAY
+
+# Serve logo bytes from disk instead of hotlinking upstream
+IMAGE_CACHE_ENABLED = os.getenv("LOGO_IMAGE_CACHE", "0") == "1"
+IMAGE_CACHE_DIR = os.getenv("LOGO_IMAGE_DIR", os.path.join("output", "logos"))
+# Prefix for cached image URLs, e.g. https://api.example.com when the frontend is on another host
+IMAGE_BASE_URL = os.getenv("LOGO_IMAGE_BASE_URL", "")
+
+
+class LogoStore:
+    """
+    Persistent company -> logo URL map.
+
+    Logos almost never change, so a resolved URL is kept for MAX_AGE and a
+    company with no logo is only retried after MISS_RETRY_INTERVAL.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = connect(db_path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS logos (
+                company TEXT PRIMARY KEY,
+                url TEXT,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def lookup(self, company_key, now=None):
+        """Return (found, url); found is False when the company has to be resolved again"""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, fetched_at FROM logos WHERE company = ?", (company_key,)
+            ).fetchone()
+        if row is None:
+            return False, None
+        url, fetched_at = row
+        max_age = MAX_AGE if url else MISS_RETRY_INTERVAL
+        if now - fetched_at > max_age:
+            return False, None
+        return True, url
+
+    def save(self, company_key, url):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO logos (company, url, fetched_at) VALUES (?, ?, ?)",
+                (company_key, url, time.time()),
+            )
+            self._conn.commit()
+
+
+def image_extension(url, content_type=None):
+    ext = os.path.splitext(url.split("?", 1)[0])[1].lower()
+    if ext in (".svg", ".png", ".jpg", ".jpeg", ".gif", ".webp"):
+        return ext
+    return mimetypes.guess_extension((content_type or "").split(";")[0].strip()) or ".img"
+
+
+def store_image(content, url, content_type=None):
+    """Write image bytes under their sha256 and return the file name"""
+    file_name = hashlib.sha256(content).hexdigest() + image_extension(url, content_type)
+    path = os.path.join(IMAGE_CACHE_DIR, file_name)
+    if not os.path.exists(path):
+        os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    return file_name
+
+
+def image_path(file_name):
+    """Path of a cached image, or None for names that are not in the cache"""
+    if os.path.basename(file_name) != file_name:
+        return None
+    path = os.path.join(IMAGE_CACHE_DIR, file_name)
+    return path if os.path.isfile(path) else None
+
+
+def image_url(file_name):
+    return f"{IMAGE_BASE_URL}/api/logos/{file_name}"
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_logo_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                db_path = os.getenv("LOGO_DB_PATH", os.path.join("output", "logos.db"))
+                os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+                _store = LogoStore(db_path)
+    return _store
@@ -1,109 +1,164 @@
-import json
-import time
-from time import sleep
-from random import randint
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
+import os
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from selenium.webdriver.support.ui import WebDriverWait
+from app.scripts.html_parsing import make_soup, has_class
+from app.scripts.sentiment import vader_compound
+from app.scripts.browser_pool import browser_pool
+
+# Upper bound on waiting for the elements we need; pages that are ready sooner return sooner
+WAIT_TIMEOUT = float(os.getenv("MOUTHSHUT_WAIT_TIMEOUT", 15))
+READ_MORE_TIMEOUT = float(os.getenv("MOUTHSHUT_READ_MORE_TIMEOUT", 3))
+
+REVIEW_SELECTOR = "div.row.review-article"
+
+# Click every "Read More" link in one pass and report how many were clicked
+EXPAND_READ_MORE_JS = """
+const links = Array.from(document.querySelectorAll('a')).filter(a => a.textContent.trim() === 'Read More');
+links.forEach(a => a.click());
+return links.length;
+"""
+COUNT_VISIBLE_READ_MORE_JS = """
+return Array.from(document.querySelectorAll('a'))
+    .filter(a => a.textContent.trim() === 'Read More' && a.offsetParent !== null).length;
+"""
+
+def page_settled(selector):
+    """Wait condition: the selector matched, or the page finished loading without it"""
+    def condition(driver):
+        return bool(driver.find_elements(By.CSS_SELECTOR, selector)) or \
+            driver.execute_script("return document.readyState") == "complete"
+    return condition
+
+def expand_and_extract(driver, page):
+    """Expand the reviews on the current tab and return their text"""
+    try:
+        WebDriverWait(driver, WAIT_TIMEOUT).until(page_settled(REVIEW_SELECTOR))
+    except TimeoutException:
+        print(f"Timed out waiting for reviews on page {page}")
+
+    # Expand all "Read More" sections
+    try:
+        if driver.execute_script(EXPAND_READ_MORE_JS):
+            WebDriverWait(driver, READ_MORE_TIMEOUT).until(
+                lambda d: d.execute_script(COUNT_VISIBLE_READ_MORE_JS) == 0
+            )
+    except TimeoutException:
+        pass
+    except Exception as e:
+        print(f"Error expanding content on page {page}: {str(e)}")
+
+    return extract_reviews(driver.page_source)
+
+def extract_reviews(html):
+    """Review texts from a MouthShut reviews page"""
+    soup = make_soup(html, parse_only=has_class('review-article'))
+    review_containers = soup.find_all('div', class_='row review-article')
+
+    # Extract review text
+    reviews = []
+    for container in review_containers:
+        review_content = container.find('div', class_='more reviewdata')
+        if review_content and review_content.text.strip():
+            reviews.append(review_content.text.strip())
+    return reviews
 
-def scrape_mouthshut(base_url, num_pages):
+def check_cancelled(cancelled):
+    """Stop between browser steps once the caller has given up on the result"""
+    if cancelled is not None and cancelled.is_set():
+        raise TimeoutError("MouthShut scrape abandoned by its caller")
+
+def scrape_mouthshut(base_url, num_pages, browser=None, cancelled=None):
     """
+    Pages are opened in separate tabs of one browser so they load in parallel,
+    then expanded and parsed one tab at a time.
+
     Args:
         base_url (str): Base URL without page number (e.g., 'https://example.com/reviews')
         num_pages (int): Number of pages to scrape
+        browser (BrowserSession): Pooled browser to use; one is borrowed if omitted
+        cancelled (threading.Event): Once set, no further pages are expanded
 
     Returns:
         list: List of review texts
     """
-    # Configure Chrome options
-    chrome_options = Options()
-    chrome_options.add_argument("--disable-infobars")
-    chrome_options.add_argument("start-maximized")
-    chrome_options.add_argument("--disable-extensions")
-    chrome_options.add_experimental_option(
-        "prefs", {"profile.default_content_setting_values.notifications": 1}
-    )
-    chrome_options.page_load_strategy = "eager"
-    chrome_options.add_argument("--headless=new")
-
-    # Initialize WebDriver with automatic ChromeDriver management
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    
+    if browser is None:
+        with browser_pool.session() as browser:
+            return scrape_mouthshut(base_url, num_pages, browser, cancelled)
+
+    driver = browser.driver
     reviews_list = []
 
     try:
-        for page in range(1, num_pages + 1):
-            current_url = f"{base_url}-page-{page}"
-            driver.get(current_url)
-            sleep(randint(1, 3))  # Randomized delay between requests
-
-            # Expand all "Read More" sections
-            try:
-                read_more_buttons = driver.find_elements(By.LINK_TEXT, 'Read More')
-                for button in read_more_buttons:
-                    button.click()
-                    sleep(0.2)
-            except Exception as e:
-                print(f"Error expanding content on page {page}: {str(e)}")
-
-            # Parse page content
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            review_containers = soup.find_all('div', class_='row review-article')
-
-            # Extract review text
-            for container in review_containers:
-                review_content = container.find('div', class_='more reviewdata')
-                if review_content and review_content.text.strip():
-                    reviews_list.append(review_content.text.strip())
-
-            print(f"Processed page {page}/{num_pages}")
+        main_tab = driver.current_window_handle
+        tabs = {}
+
+        # Kick off pages 2..N in background tabs before loading page 1 in the main tab
+        for page in range(2, num_pages + 1):
+            known = set(driver.window_handles)
+            browser.open_tab(f"{base_url}-page-{page}")
+            tabs[page] = (set(driver.window_handles) - known).pop()
+        browser.get(f"{base_url}-page-1")
+        tabs[1] = main_tab
+
+        try:
+            for page in range(1, num_pages + 1):
+                if cancelled is not None and cancelled.is_set():
+                    break
+                driver.switch_to.window(tabs[page])
+                reviews_list.extend(expand_and_extract(driver, page))
+                print(f"Processed page {page}/{num_pages}")
+        finally:
+            for page, handle in tabs.items():
+                if handle != main_tab:
+                    driver.switch_to.window(handle)
+                    driver.close()
+            driver.switch_to.window(main_tab)
 
     except Exception as e:
         print(f"Scraping interrupted: {str(e)}")
-    finally:
-        driver.quit()
+        browser.broken = True
+        # Reviews from the pages that did load are still a result; nothing at all is a failure
+        if not reviews_list:
+            raise
 
     return reviews_list
 
-def get_mouthshut_url(company_name):
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.page_load_strategy = "normal"
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+def get_mouthshut_url(company_name, browser=None):
+    if browser is None:
+        with browser_pool.session() as browser:
+            return get_mouthshut_url(company_name, browser)
+
+    driver = browser.driver
     formatted_name = company_name.strip().replace(" ", "+")
     search_url = f"https://www.mouthshut.com/search/prodsrch.aspx?data={formatted_name}&type=&p=0"
-    driver.get(search_url)
-    time.sleep(3)
+    browser.get(search_url)
 
     try:
+        WebDriverWait(driver, WAIT_TIMEOUT).until(page_settled("#productRepeater_ctl00_hypProduct"))
         product_link_element = driver.find_element(By.ID, "productRepeater_ctl00_hypProduct")
         product_url = product_link_element.get_attribute("href")
         return product_url
     except Exception as e:
         print(f"Error: {e}")
         return None
-    finally:
-        driver.quit()
-
-def mouthshut_fetch(company_name, num_pages=1):
-    url = get_mouthshut_url(company_name)
-    if not url:
-        return {"Title": "Mouthshut Review", "Rating": None, "Reviews": []}
-    
-    reviews = scrape_mouthshut(url, num_pages=num_pages)
-
-    analyzer = SentimentIntensityAnalyzer()
-    scores = [analyzer.polarity_scores(review)['compound'] for review in reviews]
 
-    if scores:
-        avg_score = sum(scores) / len(scores)
+def mouthshut_fetch(company_name, num_pages=1, cancelled=None):
+    # One pooled browser serves both the search and the review pages
+    with browser_pool.session() as browser:
+        # Waiting for a browser can outlast the task's timeout
+        check_cancelled(cancelled)
+        url = get_mouthshut_url(company_name, browser)
+        if not url:
+            return {"Title": "Mouthshut Review", "Rating": None, "Reviews": []}
+        
+        check_cancelled(cancelled)
+        reviews = scrape_mouthshut(url, num_pages=num_pages, browser=browser, cancelled=cancelled)
+
+    scores = vader_compound(reviews)
+
+    if len(scores):
+        avg_score = float(scores.mean())
         rating = round((avg_score + 1) * 5, 2) #normalize from [-1,1] to [0,10]
         rating=rating*0.8 #necessary because 20% of the text is companies thanking people
     else:
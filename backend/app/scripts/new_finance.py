@@ -1,11 +1,14 @@
-import yfinance as yf
+import asyncio
 import pandas as pd
 import numpy as np
-from scipy import stats
-import requests
-from bs4 import BeautifulSoup
+from app.scripts.html_parsing import make_soup
+from app.scripts import http_client
+from app import executors
+from app.scripts.finance_scoring import fundamentals_frame, score_fundamentals
+from app.scripts.fundamentals_store import get_store
+from app.scripts.ticker_index import lookup_ticker
 
-def financial_analysis_score(ticker_symbol):
+async def financial_analysis_score(ticker_symbol):
     """
     Calculate a comprehensive financial analysis score for a company.
     
@@ -16,71 +19,70 @@ def financial_analysis_score(ticker_symbol):
     dict: Dictionary containing overall score and component scores
     """
     try:
-        # Initialize the ticker object
-        ticker = yf.Ticker(ticker_symbol)
+        # Get financial data from the local store, refreshed only when a new period is likely
+        balance_sheet, income_stmt, cash_flow = await fetch_statements(ticker_symbol)
         
-        # Get financial data
-        balance_sheet = ticker.balance_sheet
-        income_stmt = ticker.income_stmt
-        cash_flow = ticker.cashflow
-        
-        # Check if we have enough data
-        if balance_sheet.empty:
-            print(f"Insufficient balance sheet data for {ticker_symbol}")
-            return None
-            
-        # Calculate scores
-        profitability_score = calculate_profitability_score(ticker, balance_sheet, income_stmt)
-        capitalization_score = calculate_capitalization_score(ticker, balance_sheet)
-        coverage_score = calculate_coverage_score(ticker, balance_sheet, income_stmt, cash_flow)
-        efficiency_score = calculate_efficiency_score(ticker, balance_sheet, income_stmt)
-        cost_structure_score = calculate_cost_structure_score(ticker, income_stmt)
-        
-        # Calculate weighted overall score
-        weights = {
-            'profitability': 0.30,
-            'capitalization': 0.30,
-            'coverage': 0.25,
-            'efficiency': 0.075,
-            'cost_structure': 0.075
-        }
-        
-        scores = {
-            'profitability': profitability_score,
-            'capitalization': capitalization_score,
-            'coverage': coverage_score,
-            'efficiency': efficiency_score,
-            'cost_structure': cost_structure_score
-        }
-        
-        # Filter out None values
-        valid_scores = {k: v for k, v in scores.items() if v is not None}
-        valid_weights = {k: weights[k] for k in valid_scores.keys()}
-        
-        # Normalize weights to sum to 1
-        if valid_weights:
-            weight_sum = sum(valid_weights.values())
-            valid_weights = {k: v/weight_sum for k, v in valid_weights.items()}
-            
-            # Calculate overall score
-            overall_score = sum(valid_scores[k] * valid_weights[k] for k in valid_scores.keys())
-        else:
-            overall_score = None
-        
-        return {
-            'rating': overall_score,
-            'profitability_score': profitability_score,
-            'capitalization_score': capitalization_score,
-            'coverage_score': coverage_score,
-            'efficiency_score': efficiency_score,
-            'cost_structure_score': cost_structure_score,
-            'ticker':ticker_symbol
-        }
+        return await executors.run("cpu", score_statements, ticker_symbol, balance_sheet, income_stmt, cash_flow)
         
     except Exception as e:
         print(f"Error analyzing {ticker_symbol}: {str(e)}")
         return None
 
+def score_statements(ticker_symbol, balance_sheet, income_stmt, cash_flow, ticker=None):
+    """Score already-fetched statements; the scalar counterpart of financial_analysis_scores"""
+    # Check if we have enough data
+    if balance_sheet.empty:
+        print(f"Insufficient balance sheet data for {ticker_symbol}")
+        return None
+        
+    # Calculate scores
+    profitability_score = calculate_profitability_score(ticker, balance_sheet, income_stmt)
+    capitalization_score = calculate_capitalization_score(ticker, balance_sheet)
+    coverage_score = calculate_coverage_score(ticker, balance_sheet, income_stmt, cash_flow)
+    efficiency_score = calculate_efficiency_score(ticker, balance_sheet, income_stmt)
+    cost_structure_score = calculate_cost_structure_score(ticker, income_stmt)
+    
+    # Calculate weighted overall score
+    weights = {
+        'profitability': 0.30,
+        'capitalization': 0.30,
+        'coverage': 0.25,
+        'efficiency': 0.075,
+        'cost_structure': 0.075
+    }
+    
+    scores = {
+        'profitability': profitability_score,
+        'capitalization': capitalization_score,
+        'coverage': coverage_score,
+        'efficiency': efficiency_score,
+        'cost_structure': cost_structure_score
+    }
+    
+    # Filter out None values
+    valid_scores = {k: v for k, v in scores.items() if v is not None}
+    valid_weights = {k: weights[k] for k in valid_scores.keys()}
+    
+    # Normalize weights to sum to 1
+    if valid_weights:
+        weight_sum = sum(valid_weights.values())
+        valid_weights = {k: v/weight_sum for k, v in valid_weights.items()}
+        
+        # Calculate overall score
+        overall_score = sum(valid_scores[k] * valid_weights[k] for k in valid_scores.keys())
+    else:
+        overall_score = None
+    
+    return {
+        'rating': overall_score,
+        'profitability_score': profitability_score,
+        'capitalization_score': capitalization_score,
+        'coverage_score': coverage_score,
+        'efficiency_score': efficiency_score,
+        'cost_structure_score': cost_structure_score,
+        'ticker':ticker_symbol
+    }
+
 def normalize_to_scale(value, min_val=0, max_val=10, lower_bound=0, upper_bound=10):
     """
     Normalize a value to a scale from min_val to max_val
@@ -467,11 +469,14 @@ def calculate_cost_structure_score(ticker, income_stmt):
         return None
 
 
-def analyze_company(company_name):
+async def analyze_company(company_name):
 
-    ticker_symbol=get_ticker(company_name)
+    ticker_symbol = await executors.run("network", get_ticker, company_name)
     """Analyze a company and print its financial analysis scores"""
-    results = financial_analysis_score(ticker_symbol)
+    if ticker_symbol is None:
+        print(f"Could not resolve a ticker for {company_name}")
+        return None
+    results = await financial_analysis_score(ticker_symbol)
     
     if results:
         print(f"\nFinancial Analysis for {ticker_symbol}")
@@ -503,21 +508,102 @@ def analyze_company(company_name):
     return results
 
 
+async def analyze_companies(company_names, max_workers=8):
+    """
+    Score many companies in one call.
+
+    Tickers are resolved in bulk and each distinct ticker's fundamentals are
+    fetched once, concurrently. Returns {company_name: result or None}.
+    """
+    tickers, statements = await fetch_companies_statements(company_names, max_workers)
+    return scores_by_company(tickers, await executors.run("cpu", financial_analysis_scores, statements))
+
+async def fetch_companies_statements(company_names, max_workers=8):
+    """
+    Network half of analyze_companies: ({company_name: ticker or None}, {ticker: statements}).
+
+    Split out so the scoring half can run on a CPU pool. The lookups run on
+    the network executor, at most max_workers of them at a time, so a large
+    batch does not take every network worker.
+    """
+    slots = asyncio.Semaphore(max_workers)
+
+    async def resolve(company_name):
+        try:
+            async with slots:
+                return await executors.run("network", get_ticker, company_name)
+        except Exception as e:
+            print(f"Could not resolve ticker for {company_name}: {str(e)}")
+            return None
+
+    async def fetch(ticker_symbol):
+        try:
+            async with slots:
+                return await fetch_statements(ticker_symbol)
+        except Exception as e:
+            print(f"Error fetching statements for {ticker_symbol}: {str(e)}")
+            return None
+
+    tickers = dict(zip(company_names, await asyncio.gather(*(resolve(name) for name in company_names))))
+    symbols = sorted({ticker for ticker in tickers.values() if ticker})
+    statements = dict(zip(symbols, await asyncio.gather(*(fetch(symbol) for symbol in symbols))))
+
+    return tickers, {t: s for t, s in statements.items() if s is not None}
+
+def scores_by_company(tickers, scores):
+    return {name: scores.get(ticker) for name, ticker in tickers.items()}
+
+async def fetch_statements(ticker_symbol):
+    """Balance sheet, income statement and cash flow for a ticker, via the fundamentals store"""
+    statements = await get_store().get(ticker_symbol)
+    return statements['balance_sheet'], statements['income_stmt'], statements['cashflow']
+
+def financial_analysis_scores(statements):
+    """
+    Vectorized financial_analysis_score over many tickers.
+
+    statements: {ticker_symbol: (balance_sheet, income_stmt, cash_flow)}
+    Returns {ticker_symbol: result dict, or None without balance sheet data}.
+    """
+    if not statements:
+        return {}
+    fundamentals = fundamentals_frame(statements)
+    scored = score_fundamentals(fundamentals)
+    results = {}
+    has_balance_sheet = fundamentals['has_balance_sheet'].to_numpy()
+    for (ticker_symbol, row), present in zip(scored.to_dict('index').items(), has_balance_sheet):
+        if not present:
+            print(f"Insufficient balance sheet data for {ticker_symbol}")
+            results[ticker_symbol] = None
+            continue
+        results[ticker_symbol] = {
+            key: (None if pd.isna(value) else float(value)) for key, value in row.items()
+        }
+        results[ticker_symbol]['ticker'] = ticker_symbol
+    return results
+
+
 
 
 def get_ticker(company_name):
+    # Local symbol index first; scraping NSE search is the fallback for unlisted names
+    ticker = lookup_ticker(company_name)
+    if ticker:
+        return ticker
     company_name=company_name.replace(" ","+")
     url=f"https://www.nseindia.com/search?q={company_name}&page=1&type=quotes"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36'
-    }
-    item=".searchWrp:nth-child(1) a"
     try:
-        response = requests.get(url, headers=headers)
+        response = http_client.get(url)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        for result in soup.select(item):
-            ticker=result.text.strip()
+        return parse_nse_search(response.text)
     except Exception as e:
         return None
-    return (ticker+".NS")
+
+def parse_nse_search(html):
+    """Ticker of the first NSE search result, or None"""
+    item=".searchWrp:nth-child(1) a"
+    soup = make_soup(html)
+    result = soup.select_one(item)
+    if result is None or not result.text.strip():
+        return None
+    return (result.text.strip()+".NS")
\ No newline at end of file
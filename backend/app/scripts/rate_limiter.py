@@ -0,0 +1,197 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from app.metrics import upstream_responses
+
+# Requests per second and burst size per upstream host; anything else gets DEFAULT_RATE.
+# Override or extend with HOST_RATE_LIMITS="indiankanoon.org=2:4,mouthshut.com=0.5:1"
+HOST_RATES = {
+    "indiankanoon.org": (2, 4),
+    "nseindia.com": (1, 2),
+    "ambitionbox.com": (2, 4),
+    "mouthshut.com": (1, 2),
+    "wikipedia.org": (10, 20),
+    "wikimedia.org": (10, 20),
+}
+DEFAULT_RATE = (5, 10)
+
+# Exponential backoff after 429/503 without a Retry-After: BACKOFF_BASE * 2^(n-1), capped
+BACKOFF_BASE = float(os.getenv("RATE_LIMIT_BACKOFF_BASE", 1))
+BACKOFF_MAX = float(os.getenv("RATE_LIMIT_BACKOFF_MAX", 60))
+# Fail instead of queueing when the next slot for a host is further away than this
+MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", 30))
+# Consecutive failures that open a host's circuit, and how long it stays open
+BREAKER_THRESHOLD = int(os.getenv("CIRCUIT_BREAKER_THRESHOLD", 5))
+BREAKER_COOLDOWN = float(os.getenv("CIRCUIT_BREAKER_COOLDOWN", 30))
+
+BACKOFF_STATUSES = (429, 503)
+
+
+def parse_host_rates(spec):
+    rates = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        host, rate = item.split("=", 1)
+        per_second, _, burst = rate.partition(":")
+        rates[host.strip().lower()] = (float(per_second), float(burst or 1))
+    return rates
+
+
+HOST_RATES.update(parse_host_rates(os.getenv("HOST_RATE_LIMITS", "")))
+
+
+def retry_after_seconds(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostUnavailable(Exception):
+    """Raised instead of sending a request while a host's circuit is open or its queue is too long"""
+
+
+class HostLimiter:
+    """
+    Token bucket plus circuit breaker for one upstream host.
+
+    Shared by threads and event loops alike: reserve() hands out the delay
+    until the caller's slot, and the caller sleeps however suits it.
+    """
+
+    def __init__(self, host, rate, burst):
+        self.host = host
+        self.interval = 1 / rate
+        self.tolerance = (max(burst, 1) - 1) * self.interval
+        self._lock = threading.Lock()
+        self._next_free = 0.0
+        self._blocked_until = 0.0
+        self._open_until = 0.0
+        self._probing = False
+        self.failures = 0
+        self.throttled = 0
+        self.rejected = 0
+        self.backoffs = 0
+
+    def reserve(self):
+        """Claim the next request slot and return how many seconds to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            half_open = self.failures >= BREAKER_THRESHOLD
+            if half_open and (now < self._open_until or self._probing):
+                self.rejected += 1
+                raise HostUnavailable(f"{self.host} is failing, not retrying for now")
+            start = max(now, self._blocked_until)
+            arrival = max(self._next_free, start)
+            delay = max(arrival - self.tolerance, start) - now
+            if delay > MAX_WAIT:
+                self.rejected += 1
+                raise HostUnavailable(f"{self.host} is rate limited for another {delay:.0f}s")
+            if half_open:
+                # Let one probe request through to see if the host recovered
+                self._probing = True
+            self._next_free = arrival + self.interval
+            if delay > 0:
+                self.throttled += 1
+            return delay
+
+    def record(self, status=None, retry_after=None):
+        """Feed back a response status, or None for a connection error"""
+        upstream_responses.inc(host=self.host, status="error" if status is None else status)
+        with self._lock:
+            now = time.monotonic()
+            self._probing = False
+            if status is not None and status < 500 and status != 429:
+                self.failures = 0
+                return
+            self.failures += 1
+            if status in BACKOFF_STATUSES:
+                self.backoffs += 1
+                if retry_after is None:
+                    retry_after = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.failures - 1))
+                    retry_after *= random.uniform(0.8, 1.2)
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+            if self.failures >= BREAKER_THRESHOLD:
+                self._open_until = now + BREAKER_COOLDOWN
+
+    def abandon(self):
+        """The reserved request never completed (e.g. it was cancelled), so it proves nothing"""
+        with self._lock:
+            self._probing = False
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "rate": 1 / self.interval,
+                "circuit": "open" if self.failures >= BREAKER_THRESHOLD and now < self._open_until else "closed",
+                "consecutive_failures": self.failures,
+                "blocked_for": max(0.0, self._blocked_until - now),
+                "throttled": self.throttled,
+                "backoffs": self.backoffs,
+                "rejected": self.rejected,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def rate_for(host):
+    """Configured (rate, burst) for a host or any parent domain of it"""
+    parts = host.split(".")
+    for i in range(len(parts) - 1):
+        rate = HOST_RATES.get(".".join(parts[i:]))
+        if rate is not None:
+            return rate
+    return DEFAULT_RATE
+
+
+def limiter_for(url):
+    host = (urlsplit(str(url)).hostname or "").lower()
+    limiter = _limiters.get(host)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(host)
+            if limiter is None:
+                limiter = _limiters[host] = HostLimiter(host, *rate_for(host))
+    return limiter
+
+
+def wait(url):
+    """Block until url's host may be called; returns its limiter"""
+    limiter = limiter_for(url)
+    delay = limiter.reserve()
+    if delay > 0:
+        time.sleep(delay)
+    return limiter
+
+
+async def await_slot(url):
+    limiter = limiter_for(url)
+    delay = limiter.reserve()
+    if delay > 0:
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            limiter.abandon()
+            raise
+    return limiter
+
+
+def stats():
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.host: limiter.stats() for limiter in limiters}
@@ -0,0 +1,84 @@
+import re
+import threading
+from functools import lru_cache
+import numpy as np
+from app.scripts.lexicon import load_lexicon, LEXICON_CSV_PATH, POSITIVE, NEGATIVE
+
+# Shared tokenizer for every text source
+TOKEN_PATTERN = re.compile(r'\b\w+\b')
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class LexiconIndex:
+    """
+    Vocabulary index over the LM lexicon.
+
+    Each sentiment word gets a column id; `is_positive`/`is_negative` are
+    indicator arrays over those ids, so counting hits for a whole batch is a
+    pair of bincounts.
+    """
+
+    def __init__(self, lexicon):
+        self.vocab = {word: i for i, word in enumerate(lexicon)}
+        polarity = np.fromiter(lexicon.values(), dtype=np.int8, count=len(lexicon))
+        self.is_positive = (polarity != NEGATIVE).astype(np.float64)
+        self.is_negative = (polarity != POSITIVE).astype(np.float64)
+
+
+@lru_cache(maxsize=None)
+def lexicon_index(csv_path=LEXICON_CSV_PATH):
+    return LexiconIndex(load_lexicon(csv_path))
+
+
+def lm_polarity(texts, csv_path=LEXICON_CSV_PATH):
+    """
+    Loughran-McDonald polarity for each text, (pos - neg) / (pos + neg) or 0.
+
+    Returns a float array aligned with `texts`.
+    """
+    index = lexicon_index(csv_path)
+    vocab = index.vocab
+    doc_ids = []
+    word_ids = []
+    for doc_id, text in enumerate(texts):
+        for word in tokenize(text):
+            word_id = vocab.get(word)
+            if word_id is not None:
+                doc_ids.append(doc_id)
+                word_ids.append(word_id)
+
+    n = len(texts)
+    doc_ids = np.asarray(doc_ids, dtype=np.intp)
+    word_ids = np.asarray(word_ids, dtype=np.intp)
+    positive = np.bincount(doc_ids, weights=index.is_positive[word_ids], minlength=n)
+    negative = np.bincount(doc_ids, weights=index.is_negative[word_ids], minlength=n)
+    total = positive + negative
+    return np.divide(positive - negative, total, out=np.zeros(n), where=total > 0)
+
+
+_vader = None
+_vader_lock = threading.Lock()
+
+
+def vader_analyzer():
+    """Process-wide VADER analyzer; building one re-reads its lexicon from disk"""
+    global _vader
+    if _vader is None:
+        with _vader_lock:
+            if _vader is None:
+                from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+                _vader = SentimentIntensityAnalyzer()
+    return _vader
+
+
+def vader_compound(texts):
+    """VADER compound score in [-1, 1] for each text"""
+    analyzer = vader_analyzer()
+    return np.fromiter(
+        (analyzer.polarity_scores(text)['compound'] for text in texts),
+        dtype=np.float64,
+        count=len(texts),
+    )
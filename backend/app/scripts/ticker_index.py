@@ -0,0 +1,168 @@
+import csv
+import os
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from app.scripts import http_client
+
+script_dir = os.path.dirname(__file__)
+NSE_LIST_PATH = os.getenv("NSE_EQUITY_LIST_PATH", os.path.normpath(os.path.join(script_dir, '../data/nse_equity_list.csv')))
+BSE_LIST_PATH = os.getenv("BSE_EQUITY_LIST_PATH", os.path.normpath(os.path.join(script_dir, '../data/bse_equity_list.csv')))
+# NSE's daily list of listed equities, downloaded at startup and on every reload; set to "" to only use local files
+NSE_LIST_URL = os.getenv("NSE_EQUITY_LIST_URL", "https://nsearchives.nseindia.com/content/equities/EQUITY_L.csv")
+RELOAD_INTERVAL = float(os.getenv("TICKER_INDEX_RELOAD_HOURS", 24)) * 60 * 60
+
+# Minimum trigram similarity for a fuzzy match to count; below it get_ticker falls back to NSE search
+FUZZY_THRESHOLD = float(os.getenv("TICKER_FUZZY_THRESHOLD", 0.7))
+
+SUFFIX_WORDS = {"limited", "ltd", "pvt", "private", "inc", "corporation", "corp", "co", "company", "the"}
+
+
+def normalize_name(name):
+    """Lowercase, drop punctuation and corporate suffixes: 'Tata Motors Ltd.' -> 'tata motors'"""
+    name = name.lower().replace("&", " and ")
+    words = re.findall(r'[a-z0-9]+', name)
+    return " ".join(word for word in words if word not in SUFFIX_WORDS)
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def read_equity_list(path):
+    """
+    Yield (company name, ticker) from an NSE (EQUITY_L.csv) or BSE equity list.
+
+    NSE symbols get the .NS suffix and BSE security ids get .BO, matching yfinance.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        reader.fieldnames = [field.strip() for field in reader.fieldnames or []]
+        for row in reader:
+            if row.get("SYMBOL") and row.get("NAME OF COMPANY"):
+                yield row["NAME OF COMPANY"].strip(), row["SYMBOL"].strip() + ".NS"
+            elif row.get("Security Id") and (row.get("Issuer Name") or row.get("Security Name")):
+                if (row.get("Status") or "Active").strip() != "Active":
+                    continue
+                name = row.get("Issuer Name") or row.get("Security Name")
+                yield name.strip(), row["Security Id"].strip() + ".BO"
+
+
+def covers(name, words):
+    """Whether every query word is a word of name, or the start of one ('hind unilever')"""
+    name_words = name.split()
+    return all(any(name_word.startswith(word) for name_word in name_words) for word in words)
+
+
+class TickerIndex:
+    """
+    Immutable in-memory symbol index.
+
+    Lookups try, in order: exact normalized name or bare symbol, the only
+    name starting with the query's words, then the best trigram match above
+    FUZZY_THRESHOLD whose words cover every query word. Anything ambiguous
+    returns None: a wrong ticker would score another company's statements.
+    """
+
+    def __init__(self, entries):
+        self.exact = {}
+        for name, ticker in entries:
+            key = normalize_name(name)
+            if key:
+                # First source wins, so NSE listings take precedence over BSE
+                self.exact.setdefault(key, ticker)
+            symbol_key = normalize_name(ticker.rsplit(".", 1)[0])
+            if symbol_key:
+                self.exact.setdefault(symbol_key, ticker)
+        self.names = sorted(self.exact)
+        self.postings = {}
+        self.gram_counts = []
+        for i, name in enumerate(self.names):
+            grams = trigrams(name)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(i)
+
+    def __len__(self):
+        return len(self.exact)
+
+    def prefix_match(self, key):
+        """The one name that extends the query by whole words, or None if there are none or several"""
+        i = bisect_left(self.names, key + " ")
+        matches = []
+        while i < len(self.names) and self.names[i].startswith(key + " ") and len(matches) < 2:
+            matches.append(self.names[i])
+            i += 1
+        return matches[0] if len(matches) == 1 else None
+
+    def fuzzy_match(self, key):
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        words = key.split()
+        best, best_score = None, FUZZY_THRESHOLD
+        for i, common in shared.items():
+            score = 2 * common / (len(grams) + self.gram_counts[i])
+            if score > best_score and covers(self.names[i], words):
+                best, best_score = self.names[i], score
+        return best
+
+    def lookup(self, company_name):
+        key = normalize_name(company_name)
+        if not key:
+            return None
+        if key in self.exact:
+            return self.exact[key]
+        match = self.prefix_match(key) or self.fuzzy_match(key)
+        return self.exact[match] if match else None
+
+
+_index = TickerIndex([])
+_loaded = False
+_load_lock = threading.Lock()
+
+
+def load_index(paths=None):
+    """Build a fresh index from whichever equity lists exist and swap it in"""
+    global _index, _loaded
+    entries = []
+    for path in paths or (NSE_LIST_PATH, BSE_LIST_PATH):
+        if os.path.exists(path):
+            entries.extend(read_equity_list(path))
+    with _load_lock:
+        _index = TickerIndex(entries)
+        _loaded = True
+    print(f"Ticker index loaded: {len(_index)} keys")
+    return _index
+
+
+def download_nse_list():
+    """Refresh the local NSE equity list from NSE_EQUITY_LIST_URL, unless that is empty"""
+    if not NSE_LIST_URL:
+        return
+    response = http_client.get(NSE_LIST_URL)
+    response.raise_for_status()
+    os.makedirs(os.path.dirname(NSE_LIST_PATH), exist_ok=True)
+    # Per process, since every production worker downloads the list at startup
+    tmp_path = f"{NSE_LIST_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(response.content)
+    os.replace(tmp_path, NSE_LIST_PATH)
+
+
+def reload_index():
+    try:
+        download_nse_list()
+    except Exception as e:
+        print(f"Could not download NSE equity list: {str(e)}")
+    return load_index()
+
+
+def lookup_ticker(company_name):
+    """Resolve a company name to a yfinance ticker from the local index, or None"""
+    if not _loaded:
+        load_index()
+    return _index.lookup(company_name)
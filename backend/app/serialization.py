@@ -0,0 +1,109 @@
+import json
+import os
+import zlib
+
+# orjson is several times faster than the standard library encoder; fall back to json without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Brotli is offered only when brotli (or brotlicffi) is installed; gzip always is
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# Set STREAM_COMPRESSION=0 to always send streams uncompressed
+STREAM_COMPRESSION = os.getenv("STREAM_COMPRESSION", "1").lower() in ("1", "true", "yes")
+GZIP_LEVEL = int(os.getenv("STREAM_GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("STREAM_BROTLI_QUALITY", 5))
+
+
+def dumps(value):
+    """
+    Serialize a result to UTF-8 JSON bytes.
+
+    NaN and infinity become null with orjson; the json fallback keeps them
+    as NaN/Infinity, which JSON.parse rejects.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def ndjson_line(value):
+    return dumps(value) + b"\n"
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick br or gzip from an Accept-Encoding header, or None for identity"""
+    if not STREAM_COMPRESSION or not accept_encoding:
+        return None
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    candidates = [(offered.get(name, offered.get("*", 0)), name) for name in supported]
+    quality, name = max(candidates, key=lambda candidate: candidate[0])
+    return name if quality > 0 else None
+
+
+class LineCompressor:
+    """
+    Compress a stream incrementally, flushing after every chunk.
+
+    Each flush ends on a byte boundary the client can decode, so NDJSON
+    lines still reach the browser one by one instead of sitting in the
+    compressor's buffer.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits=31 writes a gzip header and trailer
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+async def compress_stream(chunks, encoding):
+    """Compress an async iterator of byte chunks; passes them through when encoding is None"""
+    if encoding is None:
+        async for chunk in chunks:
+            yield chunk
+        return
+    compressor = LineCompressor(encoding)
+    try:
+        async for chunk in chunks:
+            yield compressor.compress(chunk)
+        yield compressor.finish()
+    finally:
+        await chunks.aclose()
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import socket
+from app import executors
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls that share a key.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task instead of starting their own. The shared
+    task is only cancelled once every caller waiting on it has gone away.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+
+    def in_flight(self):
+        return len(self._inflight)
+
+    async def do(self, key, coro_factory):
+        entry = self._inflight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(coro_factory())
+            entry = {"task": task, "waiters": 0}
+            self._inflight[key] = entry
+            task.add_done_callback(lambda _: self._forget(key, entry))
+
+        entry["waiters"] += 1
+        try:
+            return await asyncio.shield(entry["task"])
+        except asyncio.CancelledError:
+            if entry["waiters"] == 1 and not entry["task"].done():
+                entry["task"].cancel()
+            raise
+        finally:
+            entry["waiters"] -= 1
+
+    def _forget(self, key, entry):
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+
+class WorkerLeases:
+    """
+    Deduplicate a lookup across worker processes.
+
+    SingleFlight only sees one process. Here the worker that wins the lease
+    in the shared cache fetches; the others poll until the lease is released
+    and then read the result it stored. If there is no result (the fetch
+    failed or found nothing), the next waiter takes the lease and tries itself.
+    """
+
+    def __init__(self, cache, poll_interval=0.5):
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.waits = 0
+
+    async def do(self, source, company_name, lease_seconds, coro_factory):
+        while True:
+            if await executors.run("network", self.cache.acquire_lease, source, company_name, self.owner, lease_seconds):
+                try:
+                    return await coro_factory()
+                finally:
+                    # Shielded so it is released even when cancelled, and waiters in other workers are not left until expiry
+                    await asyncio.shield(executors.run("network", self.cache.release_lease, source, company_name, self.owner))
+
+            self.waits += 1
+            while await executors.run("network", self.cache.lease_held, source, company_name):
+                await asyncio.sleep(self.poll_interval)
+            value, fresh = await executors.run("network", self.cache.lookup, source, company_name)
+            if value is not None and fresh:
+                return value
@@ -0,0 +1,88 @@
+import importlib
+import sys
+import threading
+import time
+from app import executors
+
+# Source modules, in the order the background warm-up imports them
+SOURCE_MODULES = (
+    "app.scripts.logo_fetcher",
+    "app.scripts.ambitionbox_scraper",
+    "app.scripts.kanoon_scraper",
+    "app.scripts.sentiment",
+    "app.scripts.gnews_fetcher",
+    "app.scripts.new_finance",
+    "app.scripts.browser_pool",
+    "app.scripts.mouthshut_scraper",
+)
+
+# Module name -> {"seconds": ..., "new_packages": [...]} for every source imported so far
+import_report = {}
+_import_lock = threading.Lock()
+
+
+def top_level_modules():
+    return {name.partition(".")[0] for name in list(sys.modules)}
+
+
+def import_source(module_name):
+    """
+    Import a source module, recording how long it took and which packages it pulled in.
+
+    Serialized so the packages a module drags in are charged to that module.
+    """
+    module = sys.modules.get(module_name)
+    if module is not None and module_name in import_report:
+        return module
+    with _import_lock:
+        if module_name in import_report:
+            return sys.modules[module_name]
+        before = top_level_modules()
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        import_report[module_name] = {
+            "seconds": round(time.perf_counter() - start, 4),
+            "new_packages": sorted(top_level_modules() - before - {"app"}),
+        }
+        return module
+
+
+def is_loaded(module_name):
+    return module_name in import_report
+
+
+class SourceRef:
+    """
+    A function in a source module, imported the first time it is needed.
+
+    Keeps heavy scraper dependencies (selenium, yfinance, pandas, ...) out
+    of application startup.
+    """
+
+    def __init__(self, module_name, attr):
+        self.module_name = module_name
+        self.attr = attr
+
+    def load(self):
+        return getattr(import_source(self.module_name), self.attr)
+
+    def __repr__(self):
+        return f"SourceRef({self.module_name}.{self.attr})"
+
+
+async def resolve(func):
+    """The function behind a SourceRef, importing its module off the event loop if needed"""
+    if not isinstance(func, SourceRef):
+        return func
+    if is_loaded(func.module_name):
+        return func.load()
+    return await executors.run("network", func.load)
+
+
+def warm_imports():
+    """Import every source module; run in the background once the server is accepting requests"""
+    for module_name in SOURCE_MODULES:
+        try:
+            import_source(module_name)
+        except Exception as e:
+            print(f"Could not import {module_name}: {str(e)}")
@@ -0,0 +1,134 @@
+"""
+Benchmarked components.
+
+Each entry maps a name to a factory returning (func, items, check): func is
+called repeatedly, items is how many records one call handles (for
+items/sec), and check validates func's output so a benchmark cannot go
+fast by returning the wrong answer.
+"""
+import math
+from benchmarks.fixtures import load_statements, path, read_json, read_text
+
+
+def no_score(value):
+    # The scalar scorers give NaN where a statement cell is NaN; the vectorized results use None for both
+    return value is None or math.isnan(value)
+
+
+def same_score(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    return all(
+        (no_score(a[key]) and no_score(b[key])) or (
+            not no_score(a[key]) and not no_score(b[key]) and (a[key] == b[key] or math.isclose(a[key], b[key], rel_tol=1e-12))
+        )
+        for key in a if key != "ticker"
+    )
+
+
+def finance_scalar():
+    from app.scripts.new_finance import score_statements
+    statements = load_statements()
+
+    def run():
+        return {ticker: score_statements(ticker, *frames) for ticker, frames in statements.items()}
+
+    def check(result):
+        assert sum(score is not None for score in result.values()) == len(statements) - 1
+    return run, len(statements), check
+
+
+def finance_vectorized():
+    from app.scripts.new_finance import financial_analysis_scores, score_statements
+    statements = load_statements()
+    expected = {ticker: score_statements(ticker, *frames) for ticker, frames in statements.items()}
+
+    def run():
+        return financial_analysis_scores(statements)
+
+    def check(result):
+        # The vectorized scorer must agree with the scalar one for every company
+        mismatched = [ticker for ticker in statements if not same_score(result[ticker], expected[ticker])]
+        assert not mismatched, f"vectorized scores differ for {mismatched}"
+    return run, len(statements), check
+
+
+def parser(module_name, func_name, fixture, expected, html_parser=None):
+    """
+    Benchmark a page parser on a fixture.
+
+    html_parser forces a BeautifulSoup backend (e.g. "html.parser") instead
+    of the fastest installed one, to show what lxml saves per page.
+    """
+    def factory():
+        from app.scripts import html_parsing
+        module = __import__(f"app.scripts.{module_name}", fromlist=[func_name])
+        func = getattr(module, func_name)
+        html = read_text(fixture)
+
+        def run():
+            if html_parser is None:
+                return func(html)
+            active = html_parsing.PARSER
+            html_parsing.PARSER = html_parser
+            try:
+                return func(html)
+            finally:
+                html_parsing.PARSER = active
+
+        def check(result):
+            assert expected(result), f"{func_name} returned {result!r}"
+        return run, 1, check
+    return factory
+
+
+def analyze_headlines():
+    from app.scripts.gnews_fetcher import analyze_headlines
+    headlines = read_json("headlines.json")
+    lexicon = path("lexicon.csv")
+
+    def check(result):
+        assert 0 <= result["rating"] <= 10
+    return (lambda: analyze_headlines(headlines, lexicon)), len(headlines["entries"]), check
+
+
+def lm_reviews():
+    from app.scripts.sentiment import lm_polarity
+    reviews = read_json("reviews.json")
+    lexicon = path("lexicon.csv")
+
+    def check(result):
+        assert len(result) == len(reviews) and (result != 0).any()
+    return (lambda: lm_polarity(reviews, lexicon)), len(reviews), check
+
+
+def vader_reviews():
+    from app.scripts.sentiment import vader_compound
+    reviews = read_json("reviews.json")
+
+    def check(result):
+        assert len(result) == len(reviews)
+    return (lambda: vader_compound(reviews)), len(reviews), check
+
+
+# (name, module, function, fixture, check) for each soup-based page parser
+SOUP_PARSERS = [
+    ("nse_search", "new_finance", "parse_nse_search", "nse_search.html", lambda r: r == "SYM0.NS"),
+    ("kanoon_results", "kanoon_scraper", "parse_result_titles", "kanoon_results.html", lambda r: len(r) == 10),
+    ("kanoon_judgment", "kanoon_scraper", "extract_judgment_content", "kanoon_judgment.html", lambda r: bool(r)),
+    ("ambitionbox", "ambitionbox_scraper", "parse_rating", "ambitionbox.html", lambda r: r == ("4.1", 12300)),
+    ("wikipedia_logo", "logo_fetcher", "parse_infobox_logo", "wikipedia_infobox.html", lambda r: r.endswith("Fixture_logo.svg")),
+    ("mouthshut", "mouthshut_scraper", "extract_reviews", "mouthshut_reviews.html", lambda r: len(r) == 20),
+]
+
+BENCHMARKS = {
+    "finance.scalar": finance_scalar,
+    "finance.vectorized": finance_vectorized,
+    **{f"parse.{name}": parser(*spec) for name, *spec in SOUP_PARSERS},
+    # The same parsers on the pure-Python backend the scrapers used before lxml
+    **{f"parse.{name}.html_parser": parser(*spec, html_parser="html.parser") for name, *spec in SOUP_PARSERS},
+    "parse.kanoon_count": parser("kanoon_scraper", "parse_case_count", "kanoon_results.html", lambda r: r == 1234),
+    "sentiment.analyze_headlines": analyze_headlines,
+    "sentiment.lm_reviews": lm_reviews,
+    "sentiment.vader_reviews": vader_reviews,
+}
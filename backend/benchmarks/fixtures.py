@@ -0,0 +1,198 @@
+"""
+Offline fixtures for the benchmark suite.
+
+The files in benchmarks/fixtures/ are checked in. They are synthetic but
+shaped like the real inputs: yfinance annual statements, the HTML each
+scraper's selectors read (with the surrounding page bulk), Google News
+entries and MouthShut reviews. Regenerate them (deterministically) with:
+
+    python -m benchmarks.fixtures
+"""
+import csv
+import json
+import os
+import random
+import pandas as pd
+from app.scripts.finance_scoring import BALANCE_SHEET_ROWS, INCOME_STMT_ROWS, CASH_FLOW_ROWS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+SEED = 20240331
+PERIODS = ["2024-03-31", "2023-03-31"]
+
+POSITIVE_WORDS = ["gain", "growth", "profit", "strong", "improve", "record", "surge", "beat", "upgrade", "win"]
+NEGATIVE_WORDS = ["loss", "decline", "fraud", "weak", "default", "lawsuit", "probe", "miss", "downgrade", "penalty"]
+NEUTRAL_WORDS = ["company", "shares", "quarter", "board", "market", "india", "report", "plant", "launch", "deal",
+                 "customers", "service", "price", "team", "results", "sector", "investors", "year", "new", "plan"]
+
+
+def path(name):
+    return os.path.join(FIXTURES_DIR, name)
+
+
+def read_text(name):
+    with open(path(name), encoding="utf-8") as f:
+        return f.read()
+
+
+def read_json(name):
+    with open(path(name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def sentence(rng, words):
+    picked = [rng.choice(NEUTRAL_WORDS) for _ in range(words)]
+    for _ in range(rng.randint(0, 2)):
+        picked[rng.randrange(words)] = rng.choice(POSITIVE_WORDS + NEGATIVE_WORDS)
+    return " ".join(picked).capitalize()
+
+
+def filler(rng, blocks):
+    """Navigation, scripts and markup that a real page wraps around the parts we read"""
+    return "".join(
+        f'<div class="nav-item col-{i % 12}"><a href="/section/{i}">{sentence(rng, 3)}</a>'
+        f'<span class="meta">{sentence(rng, 12)}</span><script>window.t{i}={i};</script></div>'
+        for i in range(blocks)
+    )
+
+
+def page(rng, body, blocks=150):
+    return f"<!DOCTYPE html><html><head><title>Fixture</title></head><body>{filler(rng, blocks)}{body}{filler(rng, blocks)}</body></html>"
+
+
+# Rows that are negative for loss-making companies
+SIGNED_ROWS = {"Net Income", "Retained Earnings", "Operating Income", "Working Capital"}
+
+
+def statement_values(rng, rows):
+    values = {}
+    for row in rows:
+        value = round(10 ** rng.uniform(6, 11), 2)
+        if row in SIGNED_ROWS and rng.random() < 0.25:
+            value = -value
+        values[row] = value
+    return values
+
+
+def statement(rng, rows, missing_rate=0.08):
+    """
+    {period: {row: value}} for one statement.
+
+    Missing rows are dropped from every period, as when a company does not
+    report a line item.
+    """
+    present = [row for row in rows if rng.random() >= missing_rate]
+    return {period: statement_values(rng, present) for period in PERIODS}
+
+
+def add_gaps(rng, statements, gap_rate=0.05, single_period=5):
+    """
+    Blank single cells (a row reported for one period only loads as NaN in the
+    other) and cut a few companies down to their latest period, as yfinance
+    returns them for recent listings.
+    """
+    for frames in statements.values():
+        for periods in frames.values():
+            for values in periods.values():
+                for row in list(values):
+                    if rng.random() < gap_rate:
+                        del values[row]
+    for ticker in rng.sample(sorted(statements)[3:], single_period):
+        for name, periods in statements[ticker].items():
+            statements[ticker][name] = {PERIODS[0]: periods[PERIODS[0]]}
+    return statements
+
+
+def generate_statements(rng, companies=100):
+    statements = {}
+    for i in range(companies):
+        ticker = f"FIX{i:03d}.NS"
+        statements[ticker] = {
+            name: statement(rng, rows)
+            for name, rows in (
+                ("balance_sheet", BALANCE_SHEET_ROWS),
+                ("income_stmt", INCOME_STMT_ROWS),
+                ("cashflow", CASH_FLOW_ROWS),
+            )
+        }
+    # A few companies with missing statements exercise the early-exit branches
+    statements["FIX000.NS"]["balance_sheet"] = {}
+    statements["FIX001.NS"]["income_stmt"] = {}
+    statements["FIX002.NS"]["cashflow"] = {}
+    return statements
+
+
+def generate_pages(rng):
+    return {
+        "nse_search.html": page(rng, "<div class='results'>" + "".join(
+            f"<div class='searchWrp'><a href='/get-quotes/equity?symbol=SYM{i}'>SYM{i}</a><p>{sentence(rng, 4)}</p></div>"
+            for i in range(10)
+        ) + "</div>"),
+        "kanoon_results.html": page(rng, "<div class='results_middle'><b>1 - 10 of about 1,234</b>" + "".join(
+            f"<article class='result'><h4 class='result_title'><a href='/doc/{1000 + i}/'>{sentence(rng, 8)} vs State</a></h4>"
+            f"<div class='headline'>{sentence(rng, 30)}</div></article>"
+            for i in range(10)
+        ) + "</div>"),
+        "kanoon_judgment.html": page(rng, "<div class='judgments'>" + "".join(
+            f"<p id='p_{i}'>{sentence(rng, 40)}</p>" for i in range(200)
+        ) + "</div>", blocks=60),
+        "ambitionbox.html": page(rng,
+            "<div class='rating-wrapper'><span class='!text-base font-pn-700'>4.1</span>"
+            "<span class='ml-1.5 text-sm'>based on 12.3k reviews</span></div>"),
+        "wikipedia_infobox.html": page(rng,
+            "<table class='infobox vcard'><tbody><tr><td class='infobox-image logo'>"
+            "<img class='mw-file-element' src='//upload.wikimedia.org/wikipedia/commons/a/ab/Fixture_logo.svg'></td></tr>"
+            + "".join(f"<tr><th>{sentence(rng, 2)}</th><td>{sentence(rng, 6)}</td></tr>" for _ in range(20))
+            + "</tbody></table>" + "".join(f"<p>{sentence(rng, 60)}</p>" for _ in range(40))),
+        "mouthshut_reviews.html": page(rng, "".join(
+            f"<div class='row review-article'><div class='rating'>{rng.randint(1, 5)}</div>"
+            f"<div class='more reviewdata'><p>{sentence(rng, 80)}</p></div></div>"
+            for _ in range(20)
+        )),
+    }
+
+
+def generate_lexicon():
+    """A tiny lexicon in the Loughran-McDonald CSV layout"""
+    rows = [(word, 2009, 0) for word in POSITIVE_WORDS] + [(word, 0, 2009) for word in NEGATIVE_WORDS]
+    rows.append(("volatile", 2009, 2009))
+    return rows
+
+
+def generate():
+    rng = random.Random(SEED)
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    statements = generate_statements(rng)
+    # A separate stream, so adding gaps leaves the other fixtures unchanged
+    add_gaps(random.Random(SEED + 1), statements)
+    with open(path("statements.json"), "w", encoding="utf-8") as f:
+        json.dump(statements, f)
+    for name, html in generate_pages(rng).items():
+        with open(path(name), "w", encoding="utf-8") as f:
+            f.write(html)
+    with open(path("headlines.json"), "w", encoding="utf-8") as f:
+        json.dump({"entries": [
+            {"title": sentence(rng, 10), "links": [{"href": f"https://news.example.com/{i}"}]} for i in range(100)
+        ]}, f)
+    with open(path("reviews.json"), "w", encoding="utf-8") as f:
+        json.dump([sentence(rng, rng.randint(30, 120)) for _ in range(200)], f)
+    with open(path("lexicon.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Word", "Positive", "Negative"])
+        writer.writerows(generate_lexicon())
+
+
+def load_statements():
+    """{ticker: (balance_sheet, income_stmt, cash_flow)} as yfinance-shaped DataFrames"""
+    statements = {}
+    for ticker, frames in read_json("statements.json").items():
+        statements[ticker] = tuple(
+            pd.DataFrame({pd.Timestamp(period): values for period, values in frames[name].items()}, dtype="float64")
+            if any(frames[name].values()) else pd.DataFrame()
+            for name in ("balance_sheet", "income_stmt", "cashflow")
+        )
+    return statements
+
+
+if __name__ == "__main__":
+    generate()
+    print(f"Wrote fixtures to {FIXTURES_DIR}")
@@ -0,0 +1,54 @@
+import gc
+import time
+import tracemalloc
+
+
+def measure(func, min_time=0.3, repeats=5):
+    """
+    Time func() and trace its memory.
+
+    Runs func in a loop for at least min_time seconds, `repeats` times, and
+    keeps the best loop (least disturbed by the rest of the machine). Memory
+    is the tracemalloc peak of a single call, measured on its own so tracing
+    does not skew the timings.
+    """
+    func()  # warm caches and lazy imports before timing
+    best = None
+    for _ in range(repeats):
+        gc.collect()
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        per_call = elapsed / calls
+        best = per_call if best is None else min(best, per_call)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"ops_per_sec": 1 / best, "peak_kib": peak / 1024}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Regressions against a stored baseline: ops/sec more than `tolerance`
+    (a fraction) below it, or peak memory more than `tolerance` above it.
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["ops_per_sec"] < before["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['ops_per_sec']:.1f} ops/s vs {before['ops_per_sec']:.1f} baseline")
+        if result["peak_kib"] > before["peak_kib"] * (1 + tolerance) + 1:
+            regressions.append(f"{name}: {result['peak_kib']:.1f} KiB peak vs {before['peak_kib']:.1f} baseline")
+    return regressions
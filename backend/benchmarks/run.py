@@ -0,0 +1,93 @@
+"""
+Run the component benchmarks against the checked-in fixtures.
+
+From backend/:
+
+    python -m benchmarks.run                    # all benchmarks, compared to baseline.json
+    python -m benchmarks.run finance parse.nse  # only names starting with these
+    python -m benchmarks.run --save-baseline    # record the current numbers as the baseline
+
+Exits with status 1 when a check fails or a benchmark regressed by more
+than --tolerance against the baseline. Baselines are machine specific, so
+record one on the machine you compare on.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+from benchmarks.components import BENCHMARKS
+from benchmarks.harness import compare, measure
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def load_baseline(baseline_path):
+    if not os.path.exists(baseline_path):
+        return {}
+    with open(baseline_path, encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(baseline_path, results):
+    with open(baseline_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "machine": {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.machine()},
+            "results": results,
+        }, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CoPI component benchmarks")
+    parser.add_argument("names", nargs="*", help="Only run benchmarks whose name starts with one of these")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed slowdown or memory growth, as a fraction")
+    parser.add_argument("--min-time", type=float, default=0.3, help="Seconds to run each timing loop")
+    args = parser.parse_args(argv)
+
+    selected = {
+        name: factory for name, factory in BENCHMARKS.items()
+        if not args.names or any(name.startswith(prefix) for prefix in args.names)
+    }
+    baseline = load_baseline(args.baseline)
+    results = {}
+    failures = []
+
+    print(f"{'benchmark':<36} {'ops/s':>10} {'items/s':>12} {'peak KiB':>10} {'vs baseline':>12}")
+    for name, factory in selected.items():
+        try:
+            # Keep the components' progress prints out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                func, items, check = factory()
+                check(func())
+                result = measure(func, min_time=args.min_time)
+        except Exception as e:
+            failures.append(f"{name}: {type(e).__name__}: {e}")
+            print(f"{name:<36} FAILED ({e})")
+            continue
+        results[name] = result
+        change = ""
+        if name in baseline:
+            change = f"{(result['ops_per_sec'] / baseline[name]['ops_per_sec'] - 1) * 100:+.1f}%"
+        print(f"{name:<36} {result['ops_per_sec']:>10.1f} {result['ops_per_sec'] * items:>12.1f} {result['peak_kib']:>10.1f} {change:>12}")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, {**baseline, **results})
+        print(f"Saved baseline to {args.baseline}")
+        regressions = []
+    else:
+        regressions = compare(results, baseline, args.tolerance)
+
+    for failure in failures:
+        print(f"FAILED {failure}")
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if failures or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,44 @@
+"""
+Start the API server.
+
+    python run.py                        # development: one process, reloads on code changes
+    RUN_MODE=production python run.py    # production: one worker process per CPU core
+
+In production WEB_CONCURRENCY sets the number of workers. They share the
+SQLite cache under output/, and a lookup running in one worker is not
+started again by another (see WorkerLeases in app/singleflight.py). Each
+worker keeps its own browser pool, so size BROWSER_POOL_SIZE per worker.
+Each worker also runs its own background refresh scheduler and ticker
+index reload. Refreshes of the same company still share one upstream
+fetch through the lease, so the copies cost cache reads, not extra
+requests to the sources. /metrics reports every worker's samples, labelled
+worker=<pid>, whichever worker answers the scrape.
+
+On SIGTERM or SIGINT workers stop accepting connections and get
+GRACEFUL_SHUTDOWN_SECONDS to finish open streams. SIGHUP restarts the
+workers one at a time, e.g. after a deploy.
+"""
 import uvicorn
 import os
 
 port = os.getenv("PORT", 8000)
 port=int(port)
 
+PRODUCTION = os.getenv("RUN_MODE", "development").lower() in ("production", "prod")
+
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=port, reload=True)
+    if PRODUCTION:
+        workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+        # Workers read this to turn on cross-worker lookup sharing
+        os.environ["WEB_CONCURRENCY"] = str(workers)
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=port,
+            workers=workers,
+            timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", 30)),
+            proxy_headers=True,
+        )
+    else:
+        uvicorn.run("app.main:app", host="0.0.0.0", port=port, reload=True)
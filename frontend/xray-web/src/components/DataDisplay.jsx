@@ -56,10 +56,10 @@ function DataDisplay({ tasks }) {
   const { averageScore, breakdown } = calculateWeightedScore();
   const imageUrl = getImageUrl();
   
-  // Count completed metric tasks (excluding the image task)
+  // Count completed metric tasks (excluding the image task); a timed-out source is finished too
   const completedMetricTasks = Object.keys(tasks)
     .filter(key => Object.keys(WEIGHTS).includes(key) && 
-           (tasks[key].status === 'success' || tasks[key].status === 'error'))
+           ['success', 'error', 'timeout'].includes(tasks[key].status))
     .length;
   
   // Total number of metric tasks (should be 5)
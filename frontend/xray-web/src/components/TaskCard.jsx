@@ -128,8 +128,8 @@ function TaskCard({ taskName, taskData, weight }) {
         <div className="task-status">
           {taskData?.status === 'success' ? (
             <span className="status-success">✓</span>
-          ) : taskData?.status === 'error' ? (
-            <span className="status-error">✗</span>
+          ) : taskData?.status === 'error' || taskData?.status === 'timeout' ? (
+            <span className="status-error" title={taskData.error}>✗</span>
           ) : (
             <span className="status-loading"></span>
           )}